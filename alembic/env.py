@@ -10,7 +10,11 @@ load_dotenv()
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option('sqlalchemy.url', os.getenv("DB_URL"))
+# O Alembic roda com o driver síncrono mesmo quando DB_URL aponta para aiosqlite/asyncpg
+from app.database import make_sync_url
+config.set_main_option(
+    'sqlalchemy.url', make_sync_url(os.getenv("DB_URL")).render_as_string(hide_password=False)
+)
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -24,6 +28,21 @@ from app.models import Specialty, Patient, Employee, MedicalRecord, Appointment,
 from app.database import Base
 target_metadata = Base.metadata
 
+# Índice de busca (app.search): criado à mão na migração 425c2bd6d2c9 e fora
+# dos modelos. No SQLite é a tabela virtual FTS5 e suas tabelas-sombra
+# (_data, _idx, _content, _docsize, _config); no Postgres, a tabela com a
+# coluna tsvector e seus índices. Sem este filtro o autogenerate apagaria tudo.
+SEARCH_TABLE_PREFIX = "medical_records_search"
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table":
+        table_name = name
+    else:
+        table_name = getattr(getattr(object, "table", None), "name", None)
+    return not (table_name or "").startswith(SEARCH_TABLE_PREFIX)
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +66,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -70,7 +90,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,37 @@
+"""versoes_de_cache
+
+Revision ID: 3c9f5a1e7d20
+Revises: b71e0c2d94a3
+Create Date: 2026-10-18 15:10:37.402615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9f5a1e7d20'
+down_revision: Union[str, Sequence[str], None] = 'b71e0c2d94a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cache_versions = op.create_table('cache_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Linhas já criadas evitam a corrida do primeiro INSERT entre workers
+    op.bulk_insert(cache_versions, [
+        {'name': 'specialties', 'version': 0},
+        {'name': 'doctors', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cache_versions')
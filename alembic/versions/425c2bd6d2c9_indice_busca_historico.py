@@ -0,0 +1,80 @@
+"""indice_busca_historico
+
+Revision ID: 425c2bd6d2c9
+Revises: f0a7e8f1525a
+Create Date: 2026-10-18 10:03:17.551032
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '425c2bd6d2c9'
+down_revision: Union[str, Sequence[str], None] = 'f0a7e8f1525a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SOURCE_SELECT = """
+    SELECT mr.id,
+           p.name,
+           replace(replace(p.cpf, '.', ''), '-', ''),
+           mr.diagnosis,
+           mr.chief_complaint,
+           replace(replace(mr.cid_code, '.', ''), '-', '')
+    FROM medical_records mr
+    JOIN appointments a ON a.id = mr.appointment_id
+    JOIN patients p ON p.id = a.patient_id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("""
+            CREATE VIRTUAL TABLE medical_records_search USING fts5(
+                patient_name, cpf, diagnosis, chief_complaint, cid_code,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+        op.execute(
+            "INSERT INTO medical_records_search (rowid, patient_name, cpf, diagnosis, chief_complaint, cid_code) "
+            + SOURCE_SELECT
+        )
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("""
+        CREATE TABLE medical_records_search (
+            record_id INTEGER PRIMARY KEY REFERENCES medical_records(id) ON DELETE CASCADE,
+            patient_name TEXT,
+            cpf TEXT,
+            diagnosis TEXT,
+            chief_complaint TEXT,
+            cid_code TEXT,
+            document TSVECTOR GENERATED ALWAYS AS (
+                to_tsvector('simple',
+                    coalesce(patient_name, '') || ' ' || coalesce(cpf, '') || ' ' ||
+                    coalesce(diagnosis, '') || ' ' || coalesce(chief_complaint, '') || ' ' ||
+                    coalesce(cid_code, ''))
+            ) STORED
+        )
+    """)
+    op.execute("CREATE INDEX ix_medical_records_search_document ON medical_records_search USING GIN (document)")
+    op.execute(
+        "CREATE INDEX ix_medical_records_search_name_trgm ON medical_records_search "
+        "USING GIN (patient_name gin_trgm_ops)"
+    )
+    op.execute(
+        "INSERT INTO medical_records_search (record_id, patient_name, cpf, diagnosis, chief_complaint, cid_code) "
+        + SOURCE_SELECT
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE IF EXISTS medical_records_search")
@@ -0,0 +1,71 @@
+"""data_agendamento_datetime
+
+Revision ID: 6dc31ef87e90
+Revises: 425c2bd6d2c9
+Create Date: 2026-10-18 11:20:45.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6dc31ef87e90'
+down_revision: Union[str, Sequence[str], None] = '425c2bd6d2c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        # O batch do Alembic copiaria a coluna com CAST(date AS DATETIME), que no
+        # SQLite vira NUMERIC e trunca o texto para o ano. Por isso criamos a
+        # coluna nova, fazemos o backfill e só então trocamos pela antiga.
+        with op.batch_alter_table('appointments') as batch_op:
+            batch_op.add_column(sa.Column('date_new', sa.DateTime(), nullable=True))
+        # 'YYYY-MM-DDTHH:MM' (input datetime-local) -> formato DATETIME do
+        # SQLAlchemy, que compara corretamente como texto nas buscas por intervalo
+        op.execute(
+            "UPDATE appointments SET date_new = strftime('%Y-%m-%d %H:%M:%S.000000', date) "
+            "WHERE date IS NOT NULL"
+        )
+        with op.batch_alter_table('appointments') as batch_op:
+            batch_op.drop_column('date')
+            batch_op.alter_column('date_new', new_column_name='date')
+    else:
+        op.alter_column(
+            'appointments', 'date',
+            existing_type=sa.String(),
+            type_=sa.DateTime(),
+            postgresql_using="NULLIF(date, '')::timestamp without time zone",
+        )
+
+    op.create_index('ix_appointments_doctor_date_status', 'appointments', ['doctor_id', 'date', 'status'], unique=False)
+    op.create_index('ix_appointments_date', 'appointments', ['date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_date', table_name='appointments')
+    op.drop_index('ix_appointments_doctor_date_status', table_name='appointments')
+
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table('appointments') as batch_op:
+            batch_op.add_column(sa.Column('date_old', sa.String(), nullable=True))
+        op.execute(
+            "UPDATE appointments SET date_old = strftime('%Y-%m-%dT%H:%M', date) "
+            "WHERE date IS NOT NULL"
+        )
+        with op.batch_alter_table('appointments') as batch_op:
+            batch_op.drop_column('date')
+            batch_op.alter_column('date_old', new_column_name='date')
+    else:
+        op.alter_column(
+            'appointments', 'date',
+            existing_type=sa.DateTime(),
+            type_=sa.String(),
+            postgresql_using="to_char(date, 'YYYY-MM-DD\"T\"HH24:MI')",
+        )
@@ -0,0 +1,33 @@
+"""versoes_de_cache_recursos
+
+Revision ID: 9d41e6b2c8f3
+Revises: 3c9f5a1e7d20
+Create Date: 2026-10-18 18:02:11.530114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41e6b2c8f3'
+down_revision: Union[str, Sequence[str], None] = '3c9f5a1e7d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RESOURCES = ['patients', 'employees', 'users', 'appointments', 'medical_records']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Versões usadas pelos ETags das listagens (app.etag)
+    cache_versions = sa.table('cache_versions', sa.column('name', sa.String), sa.column('version', sa.Integer))
+    op.bulk_insert(cache_versions, [{'name': name, 'version': 0} for name in RESOURCES])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    cache_versions = sa.table('cache_versions', sa.column('name', sa.String))
+    op.execute(cache_versions.delete().where(cache_versions.c.name.in_(RESOURCES)))
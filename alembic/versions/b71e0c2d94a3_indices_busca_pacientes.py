@@ -0,0 +1,34 @@
+"""indices_busca_pacientes
+
+Revision ID: b71e0c2d94a3
+Revises: 6dc31ef87e90
+Create Date: 2026-10-18 14:02:11.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e0c2d94a3'
+down_revision: Union[str, Sequence[str], None] = '6dc31ef87e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índices de expressão usados pela busca por prefixo (app.lookups)
+    op.create_index('ix_patients_name_lower', 'patients', [sa.text('lower(name)')], unique=False)
+    op.create_index(
+        'ix_patients_cpf_digits', 'patients',
+        [sa.text("replace(replace(cpf, '.', ''), '-', '')")], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_patients_cpf_digits', table_name='patients')
+    op.drop_index('ix_patients_name_lower', table_name='patients')
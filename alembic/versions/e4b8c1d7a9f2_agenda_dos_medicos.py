@@ -0,0 +1,63 @@
+"""agenda_dos_medicos
+
+Revision ID: e4b8c1d7a9f2
+Revises: 9d41e6b2c8f3
+Create Date: 2026-10-18 21:14:37.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8c1d7a9f2'
+down_revision: Union[str, Sequence[str], None] = '9d41e6b2c8f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE = "status != 'canceled'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'doctor_schedules',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('weekday', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.Time(), nullable=False),
+        sa.Column('end_time', sa.Time(), nullable=False),
+        sa.Column('slot_minutes', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['doctor_id'], ['employees.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('doctor_id', 'weekday', name='uq_doctor_schedules_doctor_weekday'),
+    )
+
+    # O índice único falharia com uma mensagem pouco clara se já houver
+    # dois agendamentos ativos do mesmo médico no mesmo horário
+    duplicates = op.get_bind().execute(sa.text(
+        f"SELECT doctor_id, date FROM appointments WHERE {ACTIVE} "
+        "GROUP BY doctor_id, date HAVING count(*) > 1 LIMIT 5"
+    )).all()
+    if duplicates:
+        listed = ", ".join(f"médico {doctor_id} em {date}" for doctor_id, date in duplicates)
+        raise RuntimeError(
+            f"Agendamentos ativos em conflito ({listed}). Cancele ou remarque antes de migrar."
+        )
+    op.create_index(
+        'ux_appointments_doctor_date_active', 'appointments', ['doctor_id', 'date'], unique=True,
+        sqlite_where=sa.text(ACTIVE), postgresql_where=sa.text(ACTIVE),
+    )
+
+    cache_versions = sa.table('cache_versions', sa.column('name', sa.String), sa.column('version', sa.Integer))
+    op.bulk_insert(cache_versions, [{'name': 'doctor_schedules', 'version': 0}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    cache_versions = sa.table('cache_versions', sa.column('name', sa.String))
+    op.execute(cache_versions.delete().where(cache_versions.c.name == 'doctor_schedules'))
+    op.drop_index('ux_appointments_doctor_date_active', table_name='appointments')
+    op.drop_table('doctor_schedules')
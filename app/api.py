@@ -0,0 +1,79 @@
+"""Apoio à API JSON (/api/v1) usada por integrações.
+
+As rotas da API usam as mesmas consultas e a mesma paginação por cursor das
+telas HTMX. Os schemas ``*Response`` definem quais campos cada recurso
+expõe. Com ``?fields=name,cpf`` o SELECT traz só essas colunas, e as linhas
+viram dicionários sem passar por entidades ORM nem pelo Pydantic. Ou seja,
+os schemas servem só como lista de campos: a saída não é validada por eles,
+os tipos vêm das colunas do banco.
+
+A serialização usa orjson (requeriments.txt) via ORJSONResponse. Se o pacote
+faltar, cai no JSONResponse padrão com ``jsonable_encoder`` para datas.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+
+from app.pagination import Page
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+
+class EncodedJSONResponse(JSONResponse):
+    """JSONResponse que aceita date/datetime (usado quando não há orjson)."""
+
+    def render(self, content: Any) -> bytes:
+        return super().render(jsonable_encoder(content))
+
+
+APIResponse = ORJSONResponse if orjson is not None else EncodedJSONResponse
+
+
+def api_fields(model, schema: Type[BaseModel]) -> List[str]:
+    """Campos do schema que são colunas do modelo (os selecionáveis)."""
+    columns = inspect(model).columns.keys()
+    # id primeiro, como nas tabelas; o resto na ordem do schema
+    return sorted((name for name in schema.model_fields if name in columns), key=lambda name: name != "id")
+
+
+def parse_fields(requested: Optional[str], allowed: Sequence[str], required: Iterable[str] = ("id",)) -> List[str]:
+    """Campos pedidos em ``?fields=`` (todos se vazio), sempre com `required`."""
+    if not requested:
+        return list(allowed)
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos desconhecidos: {', '.join(unknown)}. Disponíveis: {', '.join(allowed)}.",
+        )
+    fields = [name for name in required if name not in names]
+    return fields + list(dict.fromkeys(names))
+
+
+def project(model, fields: Sequence[str]):
+    """SELECT só das colunas `fields` de `model`."""
+    return select(*[getattr(model, name) for name in fields])
+
+
+def as_dicts(rows: Iterable) -> List[Dict[str, Any]]:
+    return [row._asdict() for row in rows]
+
+
+def page_body(page: Page) -> Dict[str, Any]:
+    """Envelope das listas: dados + cursores para a próxima/anterior."""
+    return {
+        "data": as_dicts(page.items),
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
@@ -0,0 +1,60 @@
+"""Arquivos estáticos com URL versionada pelo conteúdo.
+
+Nos templates, ``{{ static_url('js/arquivo.js') }}`` gera
+``/static/js/arquivo.js?v=<hash do conteúdo>``. Como a URL muda sempre que o
+arquivo muda, a resposta pode ficar um ano no cache do navegador
+(``immutable``): o cliente baixa cada versão de um arquivo uma única vez.
+Pedidos sem ``?v=`` (ou com um hash antigo) recebem ``no-cache`` e são
+revalidados pelo ETag do próprio StaticFiles.
+"""
+import hashlib
+import os
+from threading import Lock
+from typing import Dict, Tuple
+
+import jinja2
+from starlette.datastructures import QueryParams
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+STATIC_DIR = "app/static"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# caminho relativo -> (mtime, hash)
+_hashes: Dict[str, Tuple[float, str]] = {}
+_lock = Lock()
+
+
+def file_hash(path: str, directory: str = STATIC_DIR) -> str:
+    """Hash curto do conteúdo, recalculado só quando o mtime muda."""
+    full_path = os.path.join(directory, path)
+    mtime = os.stat(full_path).st_mtime
+    cached = _hashes.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(full_path, "rb") as fh:
+        digest = hashlib.sha256(fh.read()).hexdigest()[:12]
+    with _lock:
+        _hashes[path] = (mtime, digest)
+    return digest
+
+
+@jinja2.pass_context
+def static_url(context, path: str) -> str:
+    # Só o caminho (com root_path), sem esquema/host: head.html e footerjs.html
+    # ficam em cache (cached_include) e são servidos para qualquer Host
+    url = context["request"].url_for("static", path=path).path
+    return f"{url}?v={file_hash(path)}"
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        version = QueryParams(scope.get("query_string", b"")).get("v")
+        relative = os.path.relpath(full_path, self.directory)
+        if version and version == file_hash(relative, self.directory):
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
@@ -1,6 +1,10 @@
+import asyncio
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from threading import Lock
+from typing import Optional, Tuple
 
 from dotenv import load_dotenv
 from jose import JWTError, jwt
@@ -23,6 +27,75 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+# O Argon2 é caro de propósito (~50ms de CPU e memória por chamada). Rodar
+# no event loop trava todas as outras requisições enquanto dura, então o
+# hash/verificação vai para um pool de threads limitado (o argon2-cffi libera
+# o GIL). Com a fila cheia a requisição é recusada em vez de acumular.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+# Segundos sugeridos no Retry-After quando a fila está cheia
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "2"))
+
+logger = logging.getLogger("app.auth")
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+_pending = 0
+_pending_lock = Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """A fila do pool de hash está cheia."""
+
+
+def password_queue_depth() -> int:
+    """Chamadas de hash/verificação em execução ou aguardando no pool."""
+    return _pending
+
+
+async def _run_in_hash_pool(func, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_MAX_QUEUE:
+            raise PasswordHasherBusy()
+        _pending += 1
+        depth = _pending
+    if depth > PASSWORD_HASH_WORKERS:
+        logger.debug("argon2 pool saturado: %d na fila", depth - PASSWORD_HASH_WORKERS)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, func, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run_in_hash_pool(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifica a senha uma única vez.
+
+    Retorna ``(valida, novo_hash)``; ``novo_hash`` vem preenchido quando os
+    parâmetros do hash gravado estão desatualizados (``needs_update``).
+    """
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+# Hash de referência para usuário inexistente, gerado na primeira vez
+_dummy_hash: Optional[str] = None
+
+
+async def verify_missing_user(plain_password: str) -> None:
+    """Mesmo custo de Argon2 de uma verificação real, para usuário que não existe.
+
+    Sem isso o tempo de resposta revela quais nomes de usuário existem.
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password("usuario-inexistente")
+    await _run_in_hash_pool(pwd_context.verify, plain_password, _dummy_hash)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
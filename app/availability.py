@@ -0,0 +1,211 @@
+"""Agenda dos médicos: horário de atendimento, conflitos e horários livres.
+
+Cada médico tem um período de atendimento por dia da semana
+(``DoctorSchedule``), dividido em horários de ``slot_minutes``. Quem não
+tem horário cadastrado segue o padrão da clínica (``DEFAULT_WEEK``). Os
+horários ficam em memória, invalidados pela versão ``doctor_schedules``.
+
+A checagem de conflito consulta só o intervalo do horário pedido no índice
+(doctor_id, date, status). O índice único parcial
+``ux_appointments_doctor_date_active`` garante a regra mesmo com duas
+marcações simultâneas.
+
+A busca de horários livres lê as marcações de todos os médicos da
+especialidade uma semana por vez (uma consulta por semana) e monta os
+horários vagos em memória. O custo depende do intervalo lido, não do total
+de agendamentos da tabela.
+"""
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lookups import list_doctors
+from app.models import Appointment, DoctorSchedule
+from app.versions import VersionedCache
+
+WEEKDAYS = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+
+DEFAULT_SLOT_MINUTES = int(os.getenv("DEFAULT_SLOT_MINUTES", "30"))
+DEFAULT_WORK_START = time.fromisoformat(os.getenv("DEFAULT_WORK_START", "08:00"))
+DEFAULT_WORK_END = time.fromisoformat(os.getenv("DEFAULT_WORK_END", "18:00"))
+
+SLOT_SEARCH_DAYS = 14
+SLOT_SEARCH_MAX_DAYS = 60
+SLOT_SEARCH_LIMIT = 20
+
+
+@dataclass(frozen=True)
+class WorkPeriod:
+    weekday: int
+    start: time
+    end: time
+    slot_minutes: int
+
+    def slots(self, day: date) -> Iterator[datetime]:
+        """Início de cada horário do período em `day`."""
+        step = timedelta(minutes=self.slot_minutes)
+        current = datetime.combine(day, self.start)
+        end = datetime.combine(day, self.end)
+        while current + step <= end:
+            yield current
+            current += step
+
+    def contains(self, start: datetime) -> bool:
+        """`start` é o início de um dos horários do período."""
+        if start.weekday() != self.weekday:
+            return False
+        offset = start - datetime.combine(start.date(), self.start)
+        step = timedelta(minutes=self.slot_minutes)
+        return (
+            offset >= timedelta(0)
+            and offset % step == timedelta(0)
+            and start + step <= datetime.combine(start.date(), self.end)
+        )
+
+
+@dataclass(frozen=True)
+class FreeSlot:
+    start: datetime
+    doctor_id: int
+    doctor_name: str
+
+
+# Segunda a sexta, no horário padrão da clínica
+DEFAULT_WEEK: Dict[int, WorkPeriod] = {
+    weekday: WorkPeriod(weekday, DEFAULT_WORK_START, DEFAULT_WORK_END, DEFAULT_SLOT_MINUTES)
+    for weekday in range(5)
+}
+
+schedule_cache = VersionedCache("doctor_schedules")
+
+
+async def _load_schedules(db: AsyncSession) -> Dict[int, Dict[int, WorkPeriod]]:
+    rows = await db.execute(select(
+        DoctorSchedule.doctor_id,
+        DoctorSchedule.weekday,
+        DoctorSchedule.start_time,
+        DoctorSchedule.end_time,
+        DoctorSchedule.slot_minutes,
+    ))
+    schedules: Dict[int, Dict[int, WorkPeriod]] = defaultdict(dict)
+    for doctor_id, weekday, start, end, slot_minutes in rows:
+        schedules[doctor_id][weekday] = WorkPeriod(weekday, start, end, slot_minutes)
+    return dict(schedules)
+
+
+async def doctor_week(db: AsyncSession, doctor_id: int) -> Dict[int, WorkPeriod]:
+    """Períodos de atendimento do médico por dia da semana (0 = segunda)."""
+    schedules = await schedule_cache.get(db, _load_schedules)
+    return schedules.get(doctor_id, DEFAULT_WEEK)
+
+
+async def check_slot(
+    db: AsyncSession, doctor_id: int, start: datetime, exclude_id: Optional[int] = None
+) -> Optional[str]:
+    """Motivo pelo qual `start` não pode ser agendado, ou None se está livre.
+
+    `exclude_id` é o próprio agendamento, quando ele está sendo reativado.
+    """
+    period = (await doctor_week(db, doctor_id)).get(start.weekday())
+    if period is None:
+        return f"O médico não atende neste dia da semana ({WEEKDAYS[start.weekday()].lower()})."
+    if not period.contains(start):
+        return (
+            f"Horário fora da agenda do médico: {WEEKDAYS[period.weekday].lower()}, "
+            f"das {period.start:%H:%M} às {period.end:%H:%M}, consultas de {period.slot_minutes} minutos."
+        )
+    step = timedelta(minutes=period.slot_minutes)
+    query = (
+        select(Appointment.date)
+        .where(
+            Appointment.doctor_id == doctor_id,
+            Appointment.date > start - step,
+            Appointment.date < start + step,
+            Appointment.status != "canceled",
+        )
+        .limit(1)
+    )
+    if exclude_id is not None:
+        query = query.where(Appointment.id != exclude_id)
+    conflict = await db.scalar(query)
+    if conflict is not None:
+        return f"O médico já tem uma consulta marcada às {conflict:%H:%M} de {conflict:%d/%m/%Y}."
+    return None
+
+
+def _is_free(booked: List[datetime], start: datetime, step: timedelta) -> bool:
+    # Algum agendamento em (start - step, start + step) ocupa o horário
+    index = bisect_left(booked, start - step + timedelta(microseconds=1))
+    return index == len(booked) or booked[index] >= start + step
+
+
+async def _booked(db: AsyncSession, doctor_ids, first_day: date, days: int) -> Dict[int, List[datetime]]:
+    """Inícios das marcações ativas de cada médico, em ordem, no intervalo."""
+    range_start = datetime.combine(first_day, time.min)
+    # Colunas da tabela (Core): milhares de tuplas sem o custo de carga do ORM
+    appointments = Appointment.__table__.c
+    rows = await db.execute(
+        select(appointments.doctor_id, appointments.date)
+        .where(
+            appointments.doctor_id.in_(doctor_ids),
+            appointments.date >= range_start,
+            appointments.date < range_start + timedelta(days=days),
+            appointments.status != "canceled",
+        )
+        .order_by(appointments.doctor_id, appointments.date)
+    )
+    booked: Dict[int, List[datetime]] = defaultdict(list)
+    for doctor_id, start in rows.all():
+        booked[doctor_id].append(start)
+    return booked
+
+
+async def find_free_slots(
+    db: AsyncSession,
+    specialty_id: int,
+    first_day: Optional[date] = None,
+    days: int = SLOT_SEARCH_DAYS,
+    limit: int = SLOT_SEARCH_LIMIT,
+    now: Optional[datetime] = None,
+) -> List[FreeSlot]:
+    """Próximos horários livres dos médicos da especialidade, em ordem de horário."""
+    now = now or datetime.now()
+    first_day = max(first_day or now.date(), now.date())
+    days = max(1, min(days, SLOT_SEARCH_MAX_DAYS))
+    doctors = {d.id: d.name for d in await list_doctors(db) if d.specialty_id == specialty_id}
+    if not doctors:
+        return []
+
+    schedules = await schedule_cache.get(db, _load_schedules)
+    free: List[FreeSlot] = []
+    # Uma semana por vez: a resposta costuma sair na primeira, sem ler as
+    # marcações do intervalo inteiro
+    for week_offset in range(0, days, 7):
+        week_start = first_day + timedelta(days=week_offset)
+        week_days = min(7, days - week_offset)
+        booked = await _booked(db, doctors, week_start, week_days)
+        for offset in range(week_days):
+            day = week_start + timedelta(days=offset)
+            found = []
+            for doctor_id, name in doctors.items():
+                period = schedules.get(doctor_id, DEFAULT_WEEK).get(day.weekday())
+                if period is None:
+                    continue
+                step = timedelta(minutes=period.slot_minutes)
+                starts = booked[doctor_id]
+                taken = set(starts)
+                for start in period.slots(day):
+                    # Horário exato já marcado (o caso comum) dispensa a busca binária
+                    if start > now and start not in taken and _is_free(starts, start, step):
+                        found.append(FreeSlot(start, doctor_id, name))
+            found.sort(key=lambda slot: (slot.start, slot.doctor_name))
+            free.extend(found[:limit - len(free)])
+            if len(free) >= limit:
+                return free
+    return free
@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU limitado com expiração por entrada.
+
+    O cache é por processo: com vários workers do uvicorn cada um tem a sua
+    cópia, por isso o TTL deve ser curto o suficiente para limitar o tempo
+    em que um worker pode servir um dado desatualizado.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Remove as entradas cujo valor satisfaz `predicate`."""
+        with self._lock:
+            keys = [k for k, (_, value) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def delete_keys(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove as entradas cuja chave satisfaz `predicate`."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
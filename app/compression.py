@@ -0,0 +1,134 @@
+"""Compressão das respostas (brotli ou gzip) acima de um tamanho mínimo.
+
+Brotli (``brotli`` em requeriments.txt) é usado quando o navegador o
+aceita; senão, gzip, que também é o caminho se o pacote faltar. Respostas menores que ``COMPRESS_MIN_SIZE`` bytes (a
+maioria dos 304 e fragmentos pequenos) vão sem compressão: o ganho não paga
+o custo. ``text/event-stream`` nunca é comprimido, para que cada evento
+chegue ao navegador assim que é enviado.
+
+Configuração: ``COMPRESS_MIN_SIZE`` (padrão 1024), ``GZIP_LEVEL`` (padrão 6)
+e ``BROTLI_QUALITY`` (padrão 5; níveis altos são lentos demais por requisição).
+"""
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+_SKIP_TYPES = ("text/event-stream", "image/", "font/woff", "application/zip", "application/gzip")
+
+
+class _Gzip:
+    encoding = "gzip"
+
+    def __init__(self):
+        # wbits=31: formato gzip (cabeçalho + CRC)
+        self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def process(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+
+class _Brotli:
+    encoding = "br"
+
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def process(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.process(data) + self._obj.finish()
+
+
+def _choose(accept_encoding: str):
+    accepted = {item.split(";")[0].strip() for item in accept_encoding.lower().split(",")}
+    if brotli is not None and "br" in accepted:
+        return _Brotli
+    if "gzip" in accepted:
+        return _Gzip
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        compressor_cls = _choose(Headers(scope=scope).get("Accept-Encoding", ""))
+        if compressor_cls is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message = {}
+        compressor = None
+        passthrough = False
+        # Pedaços guardados até saber se a resposta passa do tamanho mínimo
+        pending = b""
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough, pending
+            if message["type"] == "http.response.start":
+                # Segura o início até ver o corpo
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or content_type.startswith(_SKIP_TYPES):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                pending += body
+                if more_body and len(pending) < self.minimum_size:
+                    return
+                body, pending = pending, b""
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                compressor = compressor_cls()
+                headers["Content-Encoding"] = compressor.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    # Streaming: o tamanho final não é conhecido
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+
+            data = compressor.process(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
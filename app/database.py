@@ -1,27 +1,227 @@
+import logging
 import os
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.requests import Request
 from dotenv import load_dotenv
 
+from app.metrics import pool_stats
+
 load_dotenv()
 # URL do banco. Para SQLite, é apenas um arquivo local.
+# Aceita tanto a URL síncrona (sqlite:///clinic.db) quanto a assíncrona
+# (sqlite+aiosqlite:///clinic.db, postgresql+asyncpg://...).
 SQLALCHEMY_DATABASE_URL = os.getenv("DB_URL")
+# Banco só de leitura (réplica) usado pelas rotas GET. Sem ele, em SQLite
+# as leituras usam uma conexão read-only do mesmo arquivo (WAL); nos demais
+# bancos ficam no primário.
+DB_READ_URL = os.getenv("DB_READ_URL")
+
+# Driver assíncrono usado pelas rotas para cada backend suportado
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Driver síncrono usado pelo Alembic e pelos scripts de linha de comando
+SYNC_DRIVERS = {
+    "sqlite": "sqlite",
+    "postgresql": "postgresql",
+}
+
+
+def make_async_url(url: str):
+    db_url = make_url(url)
+    backend = db_url.get_backend_name()
+    if backend in ASYNC_DRIVERS and not db_url.get_dialect().is_async:
+        db_url = db_url.set(drivername=ASYNC_DRIVERS[backend])
+    return db_url
+
+
+def make_sync_url(url: str):
+    db_url = make_url(url)
+    backend = db_url.get_backend_name()
+    if backend in SYNC_DRIVERS and db_url.get_dialect().is_async:
+        db_url = db_url.set(drivername=SYNC_DRIVERS[backend])
+    return db_url
+
+
+def _connect_args(url):
+    # check_same_thread=False é necessário apenas para SQLite
+    if url.get_backend_name() == "sqlite":
+        return {"check_same_thread": False}
+    return {}
+
+
+logger = logging.getLogger("app.database")
+
+# Espera por conexão acima disso vai para o log (pool pequeno demais)
+POOL_SLOW_WAIT = float(os.getenv("DB_POOL_SLOW_WAIT", "0.1"))
+
+
+class TimedPoolMixin:
+    """Mede o tempo de cada checkout (espera na fila + conexão nova)."""
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            pool_stats.record(waited, timed_out)
+            if waited >= POOL_SLOW_WAIT:
+                logger.warning("checkout do pool levou %.0fms (%s)", waited * 1000, self.status())
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
 
-# connect_args={"check_same_thread": False} é necessário apenas para SQLite
+def _pool_options(url, pool_class) -> dict:
+    """Tamanho/timeout do pool vindos do ambiente (DB_POOL_*)."""
+    if _is_memory_sqlite(url):
+        # Banco em memória usa um pool próprio de conexão única
+        return {}
+    is_sqlite = url.get_backend_name() == "sqlite"
+    return {
+        "poolclass": pool_class,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        # Arquivo local não "cai"; em servidores de banco o ping evita erro
+        # na primeira query depois de uma conexão derrubada
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "0" if is_sqlite else "1") == "1",
+    }
+
+
+# WAL deixa leitores trabalhando enquanto alguém grava (no modo rollback
+# journal padrão, uma gravação bloqueia todas as leituras). NORMAL é seguro
+# com WAL; busy_timeout espera o lock em vez de falhar com "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negativo = KiB (aqui 64 MiB de cache de páginas por conexão)
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+}
+
+
+def _pragma_setter(pragmas: dict):
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    return set_sqlite_pragmas
+
+
+def configure_engine(engine, read_only: bool = False) -> None:
+    """Aplica os PRAGMAs em toda conexão nova de um engine SQLite."""
+    target = getattr(engine, "sync_engine", engine)
+    if target.dialect.name == "sqlite":
+        pragmas = dict(SQLITE_PRAGMAS)
+        if read_only:
+            # journal_mode é do arquivo (gravado pelo primário); aqui falharia
+            pragmas.pop("journal_mode")
+        event.listen(target, "connect", _pragma_setter(pragmas))
+
+
+def make_read_only_url(url):
+    """URL assíncrona que abre o mesmo arquivo SQLite em modo somente leitura."""
+    db_url = make_async_url(url)
+    path = os.path.abspath(db_url.database)
+    return db_url.set(database=f"file:{path}", query={"mode": "ro", "uri": "true"})
+
+
+SYNC_DATABASE_URL = make_sync_url(SQLALCHEMY_DATABASE_URL)
+ASYNC_DATABASE_URL = make_async_url(SQLALCHEMY_DATABASE_URL)
+
+# Engine síncrona: migrações, scripts e tarefas fora do event loop
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SYNC_DATABASE_URL,
+    connect_args=_connect_args(SYNC_DATABASE_URL),
+    **_pool_options(SYNC_DATABASE_URL, TimedQueuePool),
 )
+configure_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrona: usada por todas as rotas, não bloqueia o event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args=_connect_args(ASYNC_DATABASE_URL),
+    **_pool_options(ASYNC_DATABASE_URL, TimedAsyncQueuePool),
+)
+configure_engine(async_engine)
+
+# Engine de leitura: réplica (DB_READ_URL), conexão read-only do arquivo
+# SQLite ou, na falta das duas, o próprio engine principal
+if DB_READ_URL:
+    READ_DATABASE_URL = make_async_url(DB_READ_URL)
+    read_engine = create_async_engine(
+        READ_DATABASE_URL,
+        connect_args=_connect_args(READ_DATABASE_URL),
+        **_pool_options(READ_DATABASE_URL, TimedAsyncQueuePool),
+    )
+    configure_engine(read_engine)
+elif ASYNC_DATABASE_URL.get_backend_name() == "sqlite" and not _is_memory_sqlite(ASYNC_DATABASE_URL):
+    READ_DATABASE_URL = make_read_only_url(ASYNC_DATABASE_URL)
+    read_engine = create_async_engine(
+        READ_DATABASE_URL,
+        connect_args=_connect_args(READ_DATABASE_URL),
+        **_pool_options(READ_DATABASE_URL, TimedAsyncQueuePool),
+    )
+    configure_engine(read_engine, read_only=True)
+else:
+    READ_DATABASE_URL = ASYNC_DATABASE_URL
+    read_engine = async_engine
+
+# expire_on_commit=False mantém os atributos carregados após o commit,
+# já que os templates acessam os objetos depois da gravação
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
-# Dependência para injetar a sessão do banco nas rotas
-def get_db():
-    db = SessionLocal()
-    try:
+READ_METHODS = {"GET", "HEAD"}
+
+
+# Dependência para injetar a sessão do banco nas rotas: GET/HEAD leem do
+# engine de leitura, os demais métodos gravam no primário
+async def get_db(request: Request):
+    factory = AsyncReadSessionLocal if request.method in READ_METHODS else AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
+# Para rotas GET que também gravam (ex.: iniciar atendimento)
+async def get_write_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
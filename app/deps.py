@@ -1,52 +1,101 @@
-from fastapi import Depends, HTTPException, Request
-from fastapi.templating import Jinja2Templates
-from typing import List
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, Request
+from typing import List, Optional
 # from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 
 # from app.models import User
 from app.models import User
-from app import database
+from app.database import AsyncSessionLocal, get_db, get_write_db
 from app.auth import ALGORITHM, SECRET_KEY
+from app.cache import TTLCache
+from app.templating import templates
 
 # # Define que a URL para pegar o token é /auth/token
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-# Configuring templates directory for Jinja2
-templates = Jinja2Templates(directory="app/templates")
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Dados do usuário autenticado que as rotas e templates precisam."""
+    id: int
+    username: str
+    is_active: bool
+    employee_id: Optional[int]
+    role: Optional[str]
+
+
+# Cache do usuário autenticado por token: evita ir ao banco em toda requisição.
+# Como é por processo, o TTL limita o tempo que outro worker leva para ver
+# uma desativação/troca de senha feita em um worker diferente.
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "60")),
+)
+
+
+def invalidate_user_cache(user_id: Optional[int] = None, employee_id: Optional[int] = None):
+    """Remove do cache todos os tokens do usuário (ou do funcionário)."""
+    principal_cache.delete_where(
+        lambda user: (user_id is not None and user.id == user_id)
+        or (employee_id is not None and user.employee_id == employee_id)
+    )
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+async def _load_current_user(username: str) -> Optional[CurrentUser]:
+    # Abre a sessão só quando o token não está no cache. Fica no primário:
+    # numa réplica atrasada um usuário recém-desativado ainda passaria
+    async with AsyncSessionLocal() as db:
+        db_user = await db.scalar(
+            select(User).options(joinedload(User.employee)).where(User.username == username)
+        )
+        if not db_user:
+            return None
+        return CurrentUser(
+            id=db_user.id,
+            username=db_user.username,
+            is_active=bool(db_user.is_active),
+            employee_id=int(db_user.employee_id) if db_user.employee_id is not None else None,
+            role=db_user.employee.role if db_user.employee else None,
+        )
 
 
-async def get_current_user(request: Request, db: Session = Depends(get_db)):
-    token = request.cookies.get("access_token")
+async def get_current_user(request: Request):
+    # Cookie do login no navegador; integrações da API mandam o cabeçalho
+    token = request.cookies.get("access_token") or request.headers.get("Authorization")
     if not token:
         # Se não houver token, redirecionamos para o login
         raise HTTPException(status_code=302, detail="Not authenticated")
 
-    try:
-        # Lógica para decodificar JWT e buscar usuário no banco...
-        payload = jwt.decode(
-            token.replace("Bearer ", ""), SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        username = payload.get("sub")
-        db_user = db.query(User).filter(User.username == username).first()
-        
-        if not db_user:
+    user = principal_cache.get(token)
+    if user is None:
+        try:
+            # Lógica para decodificar JWT e buscar usuário no banco...
+            payload = jwt.decode(
+                token.replace("Bearer ", ""), SECRET_KEY, algorithms=[ALGORITHM]
+            )
+            username = payload.get("sub")
+            user = await _load_current_user(username)
+        except:
+            raise HTTPException(status_code=302, detail="Token invalid")
+
+        if not user:
             raise HTTPException(status_code=302, detail="Usuário não encontrado")
-        
-        request.state.user = db_user
-        return db_user
-    
-    except:
-        raise HTTPException(status_code=302, detail="Token invalid")
+
+        # A entrada nunca vive mais que o próprio token
+        expires_in = payload["exp"] - datetime.now(timezone.utc).timestamp()
+        principal_cache.set(token, user, ttl=expires_in)
+
+    if not user.is_active:
+        raise HTTPException(status_code=302, detail="Usuário desativado")
+
+    request.state.user = user
+    return user
 
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
@@ -61,10 +110,10 @@ class RoleChecker:
             raise HTTPException(status_code=302, detail="Não autenticado")
             
         # Admin tem "passe livre" em tudo
-        if user.employee.role == "admin":
+        if user.role == "admin":
             return True
             
-        if user.employee.role not in self.allowed_roles:
+        if user.role not in self.allowed_roles:
             # Se for HTMX, podemos redirecionar para uma página de "Acesso Negado"
             if request.headers.get("HX-Request"):
                 raise HTTPException(status_code=403, headers={"HX-Retarget": "#main-content"})
@@ -0,0 +1,90 @@
+"""ETags fracos para as páginas e fragmentos de listagem.
+
+O ETag de uma rota é derivado das versões (tabela ``cache_versions``) dos
+recursos que ela exibe, do usuário logado, da URL completa, de ser ou não
+uma requisição HTMX e de um resumo dos templates (um deploy que muda o HTML
+invalida tudo). Se o navegador mandar ``If-None-Match`` com o mesmo valor,
+``ETagCheck`` interrompe a rota com ``NotModified`` antes de qualquer consulta
+do ORM ou renderização: custa uma consulta por chave primária.
+
+Quem grava chama ``bump_version(db, <recurso>)`` antes do commit.
+"""
+import hashlib
+import os
+from datetime import date
+
+from fastapi import Depends, Request
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.templating import TEMPLATE_DIR
+from app.versions import get_versions
+
+# O navegador sempre revalida; a resposta é por usuário (cookie) e varia
+# entre página completa e fragmento HTMX na mesma URL
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "HX-Request, Cookie"}
+
+
+def _templates_digest(directory: str = TEMPLATE_DIR) -> str:
+    digest = hashlib.sha1()
+    for root, _, files in sorted(os.walk(directory)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(path.encode())
+            with open(path, "rb") as fh:
+                digest.update(fh.read())
+    return digest.hexdigest()[:12]
+
+
+TEMPLATES_DIGEST = _templates_digest()
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **CACHE_HEADERS})
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Comparação fraca: ignora o prefixo W/
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+class ETagCheck:
+    """Dependência de rota: ``Depends(ETagCheck("patients", "employees"))``.
+
+    ``daily=True`` para listas cujo conteúdo depende da data de hoje
+    (agendamentos do dia, fila do médico).
+    """
+
+    def __init__(self, *resources: str, daily: bool = False):
+        self.resources = resources
+        self.daily = daily
+
+    async def __call__(self, request: Request, db: AsyncSession = Depends(get_db)) -> str:
+        versions = await get_versions(db, self.resources)
+        user = getattr(request.state, "user", None)
+        parts = [
+            TEMPLATES_DIGEST,
+            ",".join(f"{name}={versions[name]}" for name in self.resources),
+            f"{user.id}:{user.role}:{user.username}" if user else "",
+            str(request.url),
+            "hx" if request.headers.get("HX-Request") else "full",
+        ]
+        if self.daily:
+            parts.append(date.today().isoformat())
+        etag = 'W/"%s"' % hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]
+        if _matches(request, etag):
+            raise NotModified(etag)
+        request.state.etag = etag
+        return etag
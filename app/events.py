@@ -0,0 +1,81 @@
+"""Pub/sub em processo para atualizar as telas de agendamento ao vivo.
+
+Cada conexão SSE (``GET /appointments/events``) assina o ``broker`` e recebe
+uma fila própria; ``publish`` entrega o evento a todas as filas sem consultar
+o banco de novo. Uma gravação gera um evento, e todos os clientes recebem.
+
+O broker é por processo: com vários workers do uvicorn, um cliente só recebe
+os eventos gerados no worker em que está conectado. Para esse cenário, troque
+o broker por um canal compartilhado (Redis, LISTEN/NOTIFY do Postgres).
+
+Um cliente lento não segura os outros. Quando a fila dele enche, os eventos
+pendentes são descartados e ele recebe um ``reset``, que faz a tela
+recarregar a lista.
+"""
+import asyncio
+import json
+import logging
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional, Set
+
+logger = logging.getLogger("app.events")
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+# Comentário periódico: mantém a conexão viva atrás de proxies
+HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT", "15"))
+
+RESET = ("reset", "{}")
+
+
+class EventBroker:
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def publish(self, event: str, data: dict) -> None:
+        message = (event, json.dumps(data, ensure_ascii=False, default=str))
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("assinante SSE atrasado: descartando %d eventos", queue.qsize())
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESET)
+
+
+broker = EventBroker()
+
+
+def format_sse(event: Optional[str], data: str) -> str:
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(request, broker: EventBroker = broker):
+    """Corpo da resposta text/event-stream de um assinante."""
+    with broker.subscribe() as queue:
+        # Reconexão do EventSource em 3s se a conexão cair
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield format_sse(event, data)
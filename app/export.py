@@ -0,0 +1,61 @@
+"""Exportação de consultas em CSV ou JSON lines, em streaming.
+
+``stream_export`` executa a consulta com ``session.stream()`` e
+``yield_per``: as linhas chegam do banco em lotes e cada lote vira um pedaço
+da resposta, então a memória usada não depende do número de linhas.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+EXPORT_BATCH_SIZE = 1000
+
+FORMATS = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+
+
+def export_format(value: str) -> str:
+    return value if value in FORMATS else "csv"
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return _json_value(value)
+
+
+async def stream_export(
+    db: AsyncSession, query, fields: List[str], fmt: str, batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[str]:
+    """Linhas do arquivo (cabeçalho incluso no CSV) para as colunas de `query`."""
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(fields)
+
+    async for partition in result.partitions():
+        for row in partition:
+            if fmt == "csv":
+                writer.writerow([_csv_value(value) for value in row])
+            else:
+                buffer.write(json.dumps(
+                    {field: _json_value(value) for field, value in zip(fields, row)}, ensure_ascii=False
+                ) + "\n")
+        # Um pedaço da resposta por lote, não por linha
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,82 @@
+"""Eventos de agendamento para as telas ao vivo (agenda e fila do médico).
+
+Depois do commit, a rota que mudou um agendamento chama
+``publish_appointment``. A função lê a linha uma vez, renderiza os dois
+parciais (linha da agenda e item da fila) e publica tudo no broker de
+app.events. Os clientes conectados trocam só o elemento daquele agendamento
+(static/js/live_appointments.js), sem recarregar a página nem refazer a
+listagem.
+"""
+from typing import Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.events import broker
+from app.models import Appointment, Employee, Patient
+from app.periods import day_range
+from app.templating import templates
+
+APPOINTMENT_STATUSES = ["scheduled", "waiting", "in_progress", "completed", "canceled"]
+# Status que mantêm o paciente na fila do médico
+QUEUE_STATUSES = ["scheduled", "waiting", "in_progress"]
+
+
+def appointment_rows():
+    """Colunas exibidas nas listas de agendamento, com os nomes via JOIN."""
+    return (
+        select(
+            Appointment.id,
+            Appointment.date,
+            Appointment.status,
+            Appointment.cost,
+            Appointment.doctor_id,
+            Patient.name.label("patient_name"),
+            Patient.cpf.label("patient_cpf"),
+            Employee.name.label("doctor_name"),
+        )
+        .join(Patient, Appointment.patient_id == Patient.id)
+        .join(Employee, Appointment.doctor_id == Employee.id)
+    )
+
+
+def queue_filter(doctor_id: int):
+    """Fila de hoje do médico: agendamentos do dia ainda não encerrados."""
+    start, end = day_range()
+    return and_(
+        Appointment.doctor_id == doctor_id,
+        Appointment.date >= start,
+        Appointment.date < end,
+        Appointment.status.in_(QUEUE_STATUSES),
+    )
+
+
+async def queue_count(db: AsyncSession, doctor_id: int) -> int:
+    return await db.scalar(select(func.count(Appointment.id)).where(queue_filter(doctor_id)))
+
+
+def _in_today_queue(row: Row) -> bool:
+    start, end = day_range()
+    return row.status in QUEUE_STATUSES and start <= row.date < end
+
+
+async def publish_appointment(db: AsyncSession, appointment_id: int) -> Optional[Row]:
+    """Publica o estado atual do agendamento; devolve a linha lida."""
+    row = (await db.execute(appointment_rows().where(Appointment.id == appointment_id))).first()
+    if row is None:
+        return None
+    env = templates.env
+    broker.publish("appointment", {
+        "id": row.id,
+        "doctor_id": row.doctor_id,
+        "status": row.status,
+        "time": row.date.strftime("%H:%M"),
+        "row": env.get_template("appointments/partials/row.html").render(
+            app=row, statuses=APPOINTMENT_STATUSES
+        ),
+        # Vazio quando o agendamento sai da fila (concluído, cancelado, outro dia)
+        "queue": env.get_template("consultations/partials/queue_item.html").render(app=row)
+        if _in_today_queue(row) else "",
+    })
+    return row
@@ -0,0 +1,105 @@
+"""Buscas rápidas (typeahead) e listas de referência dos formulários.
+
+Pacientes são buscados no banco por prefixo, sempre com LIMIT, usando os
+índices de expressão ``lower(name)`` e CPF sem pontuação. Médicos e
+especialidades são listas pequenas que quase nunca mudam: ficam inteiras em
+memória e são invalidadas pela versão do recurso (app.versions).
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import and_, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Employee, Patient, Specialty
+from app.schemas import SpecialtyResponse
+from app.versions import VersionedCache
+
+LOOKUP_LIMIT = 10
+
+# Maior caractere do plano básico: "abc" <= x < "abc\uffff" casa o prefixo
+_PREFIX_END = "\uffff"
+
+
+@dataclass(frozen=True)
+class DoctorOption:
+    id: int
+    name: str
+    specialty: Optional[str]
+    specialty_id: Optional[int] = None
+
+
+doctor_cache = VersionedCache("doctors")
+specialty_cache = VersionedCache("specialties")
+
+
+def _cpf_digits(column):
+    # Literais no SQL (não parâmetros) para casar com o índice de expressão
+    dot, dash, empty = literal_column("'.'"), literal_column("'-'"), literal_column("''")
+    return func.replace(func.replace(column, dot, empty), dash, empty)
+
+
+def _prefix(expression, term: str):
+    # Intervalo em vez de LIKE: o SQLite só usa índice em LIKE com NOCASE
+    return and_(expression >= term, expression < term + _PREFIX_END)
+
+
+async def search_patients(db: AsyncSession, term: str, limit: int = LOOKUP_LIMIT) -> list:
+    """Pacientes cujo nome ou CPF começa com `term` (id, name, cpf)."""
+    term = term.strip()
+    if not term:
+        return []
+    digits = re.sub(r"[.\-\s]", "", term)
+    if digits.isdigit():
+        order = _cpf_digits(Patient.cpf)
+        condition = _prefix(order, digits)
+    else:
+        order = func.lower(Patient.name)
+        condition = _prefix(order, func.lower(term))
+    query = (
+        select(Patient.id, Patient.name, Patient.cpf)
+        .where(condition)
+        .order_by(order)
+        .limit(limit)
+    )
+    return (await db.execute(query)).all()
+
+
+async def _load_doctors(db: AsyncSession) -> List[DoctorOption]:
+    rows = await db.execute(
+        select(Employee.id, Employee.name, Specialty.name, Employee.specialty_id)
+        .outerjoin(Specialty, Employee.specialty_id == Specialty.id)
+        .where(Employee.role == "doctor")
+        .order_by(Employee.name)
+    )
+    return [DoctorOption(*row) for row in rows]
+
+
+async def list_doctors(db: AsyncSession) -> List[DoctorOption]:
+    """Todos os médicos (com especialidade), em cache por processo."""
+    return await doctor_cache.get(db, _load_doctors)
+
+
+async def _load_specialties(db: AsyncSession) -> List[SpecialtyResponse]:
+    specialties = await db.scalars(select(Specialty).order_by(Specialty.name))
+    return [SpecialtyResponse.model_validate(s) for s in specialties]
+
+
+async def list_specialties(db: AsyncSession) -> List[SpecialtyResponse]:
+    """Especialidades já validadas, em cache por processo."""
+    return await specialty_cache.get(db, _load_specialties)
+
+
+async def search_doctors(db: AsyncSession, term: str, limit: int = LOOKUP_LIMIT) -> List[DoctorOption]:
+    """Médicos cujo nome (ou especialidade) começa com `term`."""
+    term = term.strip().lower()
+    doctors = await list_doctors(db)
+    if term:
+        doctors = [
+            d for d in doctors
+            if d.name.lower().startswith(term)
+            or any(word.startswith(term) for word in d.name.lower().split())
+            or (d.specialty or "").lower().startswith(term)
+        ]
+    return doctors[:limit]
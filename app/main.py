@@ -1,16 +1,95 @@
+import time
+from contextlib import asynccontextmanager
+
 # FASTAPI Imports
 from fastapi import Depends, FastAPI, Request, Response
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse
 
-from app.database import Base, engine
+from app.database import Base, async_engine, engine, read_engine
 from app.deps import get_current_user, templates
-from app.routers import auth, employees, patients, specialties, users, appointments, medical_records
+from app.assets import STATIC_DIR, FingerprintedStaticFiles
+from app.auth import password_queue_depth
+from app.compression import CompressionMiddleware
+from app.etag import CACHE_HEADERS, NotModified, not_modified_response
+from app.events import broker
+from app.metrics import (
+    QUERY_COUNT_HEADER,
+    logger as sql_logger,
+    render_prometheus,
+    request_registry,
+    start_request_metrics,
+    track_queries,
+)
+from app.templating import precompile_templates
+from app.api import APIResponse
+from app.routers import api, auth, dashboard, employees, patients, specialties, users, appointments, medical_records
 
 # Initialize FASTAPI
 
-app = FastAPI()
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compila os templates antes da primeira requisição
+    precompile_templates(templates.env)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount("/static", FingerprintedStaticFiles(directory=STATIC_DIR), name="static")
+
+track_queries(async_engine)
+if read_engine is not async_engine:
+    track_queries(read_engine)
+
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    # Tempo total x banco x template e número de comandos SQL por requisição
+    metrics = start_request_metrics()
+    response = await call_next(request)
+    total = time.perf_counter() - metrics.started_at
+
+    route = request.scope.get("route")
+    # Agrupa pelo padrão da rota (/patients/edit/{patient_id}), não pela URL
+    request_registry.observe(request.method, getattr(route, "path", "unmatched"), total, metrics)
+
+    # ETag calculado por app.etag.ETagCheck na rota
+    etag = getattr(request.state, "etag", None)
+    if etag and response.status_code == 200:
+        response.headers["ETag"] = etag
+        response.headers.update(CACHE_HEADERS)
+
+    response.headers[QUERY_COUNT_HEADER] = str(metrics.count)
+    response.headers["Server-Timing"] = metrics.server_timing(total)
+    sql_logger.debug(
+        "%s %s -> %d queries, db %.1fms, tpl %.1fms, total %.1fms",
+        request.method, request.url.path, metrics.count,
+        metrics.db_seconds * 1000, metrics.template_seconds * 1000, total * 1000,
+    )
+    return response
+
+
+# Registrado depois do middleware acima, fica por fora: comprime a resposta final
+app.add_middleware(CompressionMiddleware)
+
+
+def _checked_out(engine) -> int:
+    # Pools de conexão única (SQLite em memória) não contam checkouts
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout else 0
+
+
+# Sem autenticação: é lido pelo Prometheus, que não tem o cookie de sessão.
+# Expõe só nomes de rotas e números; restrinja no proxy se for público.
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    gauges = {
+        "password_hash_queue_depth": password_queue_depth(),
+        "db_pool_checked_out": _checked_out(async_engine),
+        "sse_subscribers": broker.subscribers,
+    }
+    if read_engine is not async_engine:
+        gauges["db_read_pool_checked_out"] = _checked_out(read_engine)
+    return PlainTextResponse(render_prometheus(gauges), media_type="text/plain; version=0.0.4")
 
 
 app.include_router(auth.router)
@@ -20,6 +99,9 @@ app.include_router(users.router, dependencies=[Depends(get_current_user)])
 app.include_router(employees.router, dependencies=[Depends(get_current_user)])
 app.include_router(appointments.router, dependencies=[Depends(get_current_user)])
 app.include_router(medical_records.router, dependencies=[Depends(get_current_user)])
+app.include_router(dashboard.router, dependencies=[Depends(get_current_user)])
+app.include_router(api.token_router)
+app.include_router(api.router, dependencies=[Depends(get_current_user)])
 
 
 @app.exception_handler(302)
@@ -27,6 +109,12 @@ app.include_router(medical_records.router, dependencies=[Depends(get_current_use
 async def auth_exception_handler(request: Request, exc: Exception):
     login_url = "/auth/login"
 
+    # Clientes da API não seguem redirecionamento para a tela de login
+    if request.url.path.startswith("/api/"):
+        return APIResponse(
+            {"detail": "Não autenticado"}, status_code=401, headers={"WWW-Authenticate": "Bearer"}
+        )
+
     # Se for uma requisição HTMX, o redirecionamento comum não funciona bem (ele tentaria carregar o login dentro de uma div)
     # Por isso, usamos o cabeçalho HX-Redirect
     if request.headers.get("HX-Request"):
@@ -36,6 +124,11 @@ async def auth_exception_handler(request: Request, exc: Exception):
     return RedirectResponse(url=login_url)
 
 
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return not_modified_response(exc.etag)
+
+
 @app.get("/", response_class=HTMLResponse, dependencies=[Depends(get_current_user)])
 async def index(request: Request):
     template_name = (
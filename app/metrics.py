@@ -0,0 +1,224 @@
+"""Métricas por requisição, por rota e do pool de conexões.
+
+Cada requisição abre um ``RequestMetrics`` num ContextVar; os eventos do
+engine somam os comandos SQL e o tempo gasto no banco, e o ``Jinja2Templates``
+de app.deps soma o tempo de renderização. O middleware de app.main devolve
+tudo no cabeçalho ``Server-Timing`` (e a contagem em ``X-Query-Count``) e
+acumula histogramas por rota, expostos em texto no formato do Prometheus
+por ``GET /metrics``.
+
+Com ``SLOW_QUERY_MS`` definido, comandos mais lentos que isso vão para o log
+``app.sql.slow``.
+
+``pool_stats`` acumula quantas conexões foram retiradas do pool, quanto tempo
+se esperou por elas e quantas esperas estouraram o timeout.
+"""
+import bisect
+import logging
+import os
+import time
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger("app.sql")
+slow_logger = logging.getLogger("app.sql.slow")
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "0")) / 1000
+
+# Limites (em segundos) dos baldes dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestMetrics:
+    __slots__ = ("count", "db_seconds", "template_seconds", "started_at")
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.started_at = time.perf_counter()
+
+    def server_timing(self, total: float) -> str:
+        return (
+            f'db;desc="{self.count} queries";dur={self.db_seconds * 1000:.1f}, '
+            f"tpl;dur={self.template_seconds * 1000:.1f}, "
+            f"total;dur={total * 1000:.1f}"
+        )
+
+
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def start_request_metrics() -> RequestMetrics:
+    """Abre as métricas da requisição atual."""
+    metrics = RequestMetrics()
+    _current_request.set(metrics)
+    return metrics
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    return _current_request.get()
+
+
+def current_query_count() -> int:
+    metrics = _current_request.get()
+    return metrics.count if metrics else 0
+
+
+def add_template_time(seconds: float) -> None:
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.template_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.count += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.db_seconds += elapsed
+    if SLOW_QUERY_SECONDS and elapsed >= SLOW_QUERY_SECONDS:
+        slow_logger.warning("%.1fms %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+
+def track_queries(engine) -> None:
+    """Registra os contadores num engine (síncrono ou o sync_engine do async)."""
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.total = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.total += 1
+
+
+class RouteStats:
+    __slots__ = ("latency", "db_seconds", "template_seconds", "queries")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.queries = 0
+
+
+class RequestRegistry:
+    """Histogramas e totais por (método, rota)."""
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        self._lock = Lock()
+
+    def observe(self, method: str, route: str, total: float, metrics: RequestMetrics) -> None:
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = RouteStats()
+            stats.latency.observe(total)
+            stats.db_seconds += metrics.db_seconds
+            stats.template_seconds += metrics.template_seconds
+            stats.queries += metrics.count
+
+    def render(self) -> List[str]:
+        lines = [
+            "# HELP http_request_duration_seconds Latência total da requisição por rota.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            routes = sorted(self._routes.items())
+            for (method, route), stats in routes:
+                labels = f'method="{method}",route="{route}"'
+                cumulative = 0
+                for bound, count in zip(stats.latency.buckets, stats.latency.counts):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.latency.total}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.latency.sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.latency.total}")
+            for name, attr, help_text in (
+                ("http_request_db_seconds_total", "db_seconds", "Tempo gasto em comandos SQL."),
+                ("http_request_template_seconds_total", "template_seconds", "Tempo gasto renderizando templates."),
+                ("http_request_queries_total", "queries", "Comandos SQL executados."),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (method, route), stats in routes:
+                    value = getattr(stats, attr)
+                    value = f"{value:.6f}" if isinstance(value, float) else value
+                    lines.append(f'{name}{{method="{method}",route="{route}"}} {value}')
+        return lines
+
+
+request_registry = RequestRegistry()
+
+
+class PoolStats:
+    """Totais de checkout do pool (alimentados por app.database.TimedPoolMixin)."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = Lock()
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self, pool=None) -> dict:
+        data = {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+        if pool is not None and hasattr(pool, "checkedout"):
+            data.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return data
+
+
+pool_stats = PoolStats()
+
+
+def render_prometheus(gauges: Dict[str, float]) -> str:
+    """Texto do /metrics: histogramas por rota, pool e medidores extras."""
+    lines = request_registry.render()
+    pool = pool_stats.snapshot()
+    for key, kind in (
+        ("checkouts", "counter"),
+        ("timeouts", "counter"),
+        ("wait_seconds_total", "counter"),
+        ("wait_seconds_max", "gauge"),
+    ):
+        name = f"db_pool_{key}"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {pool[key]}")
+    for name, value in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -4,3 +4,5 @@ from .medical_record import MedicalRecord
 from .patient import Patient
 from .specialty import Specialty
 from .user import User
+from .cache_version import CacheVersion
+from .doctor_schedule import DoctorSchedule
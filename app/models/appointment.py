@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -6,13 +6,24 @@ from app.database import Base
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Fila do médico: doctor_id + intervalo de datas + status
+        Index("ix_appointments_doctor_date_status", "doctor_id", "date", "status"),
+        # Agenda geral da clínica por intervalo de datas
+        Index("ix_appointments_date", "date"),
+        # Um horário por médico: duas marcações simultâneas no mesmo horário
+        # falham no banco mesmo que as duas passem pela checagem de conflito
+        Index(
+            "ux_appointments_doctor_date_active", "doctor_id", "date", unique=True,
+            sqlite_where=text("status != 'canceled'"),
+            postgresql_where=text("status != 'canceled'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"))
     doctor_id = Column(Integer, ForeignKey("employees.id"))
-    date = Column(
-        String
-    )  # Armazenaremos como ISO String 'YYYY-MM-DDTHH:MM:SS' para simplificar SQLite
+    date = Column(DateTime)
     status = Column(
         String, default="scheduled"
     )  # scheduled, waiting, in_progress, completed, canceled
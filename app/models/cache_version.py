@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+
+from app.database import Base
+
+
+class CacheVersion(Base):
+    """Contador de versão por recurso, compartilhado entre os workers.
+
+    Cada gravação incrementa a versão do recurso na mesma transação; os
+    caches em memória comparam a versão guardada com a do banco (app.versions).
+    """
+
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
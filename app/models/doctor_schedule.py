@@ -0,0 +1,24 @@
+from sqlalchemy import Column, ForeignKey, Integer, Time, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class DoctorSchedule(Base):
+    """Horário de atendimento do médico em um dia da semana.
+
+    Médicos sem nenhuma linha aqui usam o horário padrão da clínica
+    (app.availability.DEFAULT_WEEK).
+    """
+
+    __tablename__ = "doctor_schedules"
+    __table_args__ = (UniqueConstraint("doctor_id", "weekday", name="uq_doctor_schedules_doctor_weekday"),)
+
+    id = Column(Integer, primary_key=True)
+    doctor_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    weekday = Column(Integer, nullable=False)  # 0 = segunda ... 6 = domingo
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    slot_minutes = Column(Integer, nullable=False, default=30)
+
+    doctor = relationship("Employee", back_populates="schedules")
@@ -23,3 +23,4 @@ class Employee(Base):
     user_account = relationship("User", back_populates="employee", uselist=False)
     appointments = relationship("Appointment", back_populates="doctor")
     specialty_data = relationship("Specialty", back_populates="doctors")
+    schedules = relationship("DoctorSchedule", back_populates="doctor", passive_deletes=True)
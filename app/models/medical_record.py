@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import JSON, Column, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Column, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -8,6 +8,8 @@ from app.database import Base
 
 class MedicalRecord(Base):
     __tablename__ = "medical_records"
+    # Suporta a paginação por cursor do histórico (mais recentes primeiro)
+    __table_args__ = (Index("ix_medical_records_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     appointment_id = Column(Integer, ForeignKey("appointments.id"), unique=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, Integer, String
+from sqlalchemy import Column, Date, Index, Integer, String, func
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -16,5 +16,11 @@ class Patient(Base):
 
     appointments = relationship("Appointment", back_populates="patient")
 
+    # Índices de expressão para a busca por prefixo do agendamento (app.lookups)
+    __table_args__ = (
+        Index("ix_patients_name_lower", func.lower(name)),
+        Index("ix_patients_cpf_digits", func.replace(func.replace(cpf, ".", ""), "-", "")),
+    )
+
 
 from . import Appointment
@@ -0,0 +1,140 @@
+import base64
+import json
+import os
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[list]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        # Cursor inválido/antigo: volta para a primeira página
+        return None
+    return values if isinstance(values, list) else None
+
+
+async def _fetch(db: AsyncSession, query) -> list:
+    # Entidades ORM vêm por scalars(); consultas de colunas vêm como Row
+    descriptions = query.column_descriptions
+    if len(descriptions) == 1 and isinstance(descriptions[0]["expr"], type):
+        return list((await db.scalars(query)).all())
+    return list((await db.execute(query)).all())
+
+
+def _restore(keys: Sequence, values: Optional[list]) -> Optional[list]:
+    # O JSON do cursor guarda datas como texto; colunas DateTime precisam
+    # receber datetime de volta para o bind do driver
+    if values is None or len(values) != len(keys):
+        return None
+    restored = []
+    for col, value in zip(keys, values):
+        if isinstance(value, str) and getattr(col.type, "python_type", None) is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        restored.append(value)
+    return restored
+
+
+def _key_of(item: Any, keys: Sequence) -> list:
+    return [getattr(item, col.key) for col in keys]
+
+
+def _compare(keys: Sequence, values: list, greater: bool):
+    left = keys[0] if len(keys) == 1 else tuple_(*keys)
+    right = values[0] if len(keys) == 1 else tuple_(*values)
+    return left > right if greater else left < right
+
+
+async def keyset_paginate(
+    db: AsyncSession,
+    query,
+    keys: Sequence,
+    size: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    descending: bool = False,
+    offset: int = 0,
+) -> Page:
+    """Paginação por cursor (keyset) sobre as colunas `keys`.
+
+    `keys` precisa identificar cada linha de forma única (termine com o id).
+    O custo de qualquer página é o de uma busca no índice, ao contrário do
+    OFFSET que percorre todas as linhas anteriores. `offset` só é usado
+    quando nenhum cursor é informado (links antigos com ?page=N).
+    """
+    after_values = _restore(keys, decode_cursor(after))
+    before_values = _restore(keys, decode_cursor(before))
+    asc = [col.asc() for col in keys]
+    desc = [col.desc() for col in keys]
+
+    if before_values is not None:
+        # Página anterior: percorre no sentido inverso e desvira o resultado
+        query = query.where(_compare(keys, before_values, greater=descending))
+        query = query.order_by(*(asc if descending else desc)).limit(size + 1)
+        rows = await _fetch(db, query)
+        has_more = len(rows) > size
+        items = list(reversed(rows[:size]))
+        return Page(
+            items=items,
+            next_cursor=encode_cursor(_key_of(items[-1], keys)) if items else None,
+            prev_cursor=encode_cursor(_key_of(items[0], keys)) if items and has_more else None,
+        )
+
+    if after_values is not None:
+        query = query.where(_compare(keys, after_values, greater=not descending))
+    elif offset:
+        query = query.offset(offset)
+    query = query.order_by(*(desc if descending else asc)).limit(size + 1)
+    rows = await _fetch(db, query)
+    has_more = len(rows) > size
+    items = rows[:size]
+    has_prev = after_values is not None or offset > 0
+    return Page(
+        items=items,
+        next_cursor=encode_cursor(_key_of(items[-1], keys)) if items and has_more else None,
+        prev_cursor=encode_cursor(_key_of(items[0], keys)) if items and has_prev else None,
+    )
+
+
+# Total de registros em cache por alguns segundos: o COUNT(*) é a parte
+# cara das listas e o número exibido no rodapé não precisa ser exato.
+count_cache = TTLCache(maxsize=256, ttl=float(os.getenv("COUNT_CACHE_TTL", "30")))
+
+
+async def cached_count(db: AsyncSession, resource: str, query, *key) -> int:
+    cache_key = (resource, *key)
+    total = count_cache.get(cache_key)
+    if total is None:
+        total = await db.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+        count_cache.set(cache_key, total)
+    return total
+
+
+def invalidate_count(resource: str) -> None:
+    count_cache.delete_keys(lambda key: key[0] == resource)
@@ -0,0 +1,181 @@
+"""Importação e exportação de pacientes em lote (CSV ou JSON lines).
+
+Importação: o arquivo é lido em blocos de ``PATIENT_IMPORT_CHUNK`` linhas.
+Cada linha é validada com ``PatientCreate`` (leitura e validação do bloco
+rodam no threadpool, fora do event loop); os CPFs do bloco são checados
+contra o banco com uma única consulta ``IN`` e os novos pacientes entram com
+um INSERT em lote, um commit por bloco. O progresso é devolvido como JSON
+lines, um objeto por evento:
+
+    {"type": "error", "row": 12, "message": "..."}
+    {"type": "duplicate", "row": 13, "cpf": "..."}
+    {"type": "progress", "processed": 500, "inserted": 480, ...}
+    {"type": "done", "processed": ..., "inserted": ..., ...}
+
+Exportação: as linhas vêm do banco em streaming (app.export), então a
+memória usada não cresce com o tamanho da tabela.
+"""
+import codecs
+import csv
+import json
+import os
+import re
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.export import FORMATS, stream_export
+from app.models import Patient
+from app.schemas import PatientCreate
+from app.versions import bump_version
+
+IMPORT_CHUNK_SIZE = int(os.getenv("PATIENT_IMPORT_CHUNK", "500"))
+
+FIELDS = ["name", "cpf", "birth_date", "contact", "address"]
+
+_BR_DATE = re.compile(r"^(\d{2})/(\d{2})/(\d{4})$")
+
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    if requested in FORMATS:
+        return requested
+    name = (filename or "").lower()
+    return "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def format_cpf(cpf: str) -> str:
+    """Grava sempre no formato da máscara do formulário (000.000.000-00)."""
+    digits = re.sub(r"\D", "", cpf)
+    if len(digits) != 11:
+        return cpf
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+
+
+def _text_lines(raw) -> Iterator[str]:
+    # utf-8-sig: planilhas exportadas pelo Excel começam com BOM
+    return codecs.getreader("utf-8-sig")(raw, errors="replace")
+
+
+def read_rows(raw, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """(número da linha, dados) para cada registro do arquivo binário `raw`."""
+    lines = _text_lines(raw)
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # line_num conta o cabeçalho, como a planilha do usuário
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            record = {"__error__": f"JSON inválido: {exc.msg}"}
+        yield number, record if isinstance(record, dict) else {"__error__": "linha não é um objeto JSON"}
+
+
+def _validate(record: Dict) -> PatientCreate:
+    data = {field: (record.get(field) or None) for field in FIELDS}
+    if data["cpf"] is not None:
+        data["cpf"] = str(data["cpf"]).strip()
+    birth = data["birth_date"]
+    if isinstance(birth, str):
+        match = _BR_DATE.match(birth.strip())
+        if match:
+            data["birth_date"] = f"{match[3]}-{match[2]}-{match[1]}"
+    patient = PatientCreate(**data)
+    patient.cpf = format_cpf(patient.cpf)
+    return patient
+
+
+def _error_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def _prepare_chunk(
+    rows: Iterator[Tuple[int, Dict]], size: int, seen_cpfs: Set[str]
+) -> Tuple[int, List[Dict], List[Tuple[int, PatientCreate]]]:
+    """Lê e valida as próximas `size` linhas: (lidas, eventos, válidas).
+
+    Parsing do CSV/JSON e validação do Pydantic são CPU puro; rodam numa
+    thread (import_patients) para não travar o event loop num arquivo grande.
+    """
+    events: List[Dict] = []
+    valid: List[Tuple[int, PatientCreate]] = []
+    chunk = list(islice(rows, size))
+    for number, record in chunk:
+        if "__error__" in record:
+            events.append({"type": "error", "row": number, "message": record["__error__"]})
+            continue
+        try:
+            patient = _validate(record)
+        except ValidationError as exc:
+            events.append({"type": "error", "row": number, "message": _error_message(exc)})
+            continue
+        if patient.cpf in seen_cpfs:
+            events.append({"type": "duplicate", "row": number, "cpf": patient.cpf, "message": "CPF repetido no arquivo"})
+            continue
+        seen_cpfs.add(patient.cpf)
+        valid.append((number, patient))
+    return len(chunk), events, valid
+
+
+async def import_patients(
+    db: AsyncSession, rows: Iterator[Tuple[int, Dict]], chunk_size: int = IMPORT_CHUNK_SIZE
+) -> AsyncIterator[Dict]:
+    """Importa em blocos e produz os eventos de progresso/erro."""
+    totals = {"processed": 0, "inserted": 0, "duplicates": 0, "errors": 0}
+    seen_cpfs: Set[str] = set()
+
+    while True:
+        # Um bloco por vez na thread: seen_cpfs nunca é usado em paralelo
+        read, events, valid = await run_in_threadpool(_prepare_chunk, rows, chunk_size, seen_cpfs)
+        if not read:
+            break
+        totals["processed"] += read
+        for event in events:
+            totals["errors" if event["type"] == "error" else "duplicates"] += 1
+            yield event
+
+        if valid:
+            existing = set(await db.scalars(
+                select(Patient.cpf).where(Patient.cpf.in_([patient.cpf for _, patient in valid]))
+            ))
+            new = []
+            for number, patient in valid:
+                if patient.cpf in existing:
+                    totals["duplicates"] += 1
+                    yield {"type": "duplicate", "row": number, "cpf": patient.cpf, "message": "CPF já cadastrado"}
+                else:
+                    new.append((number, patient))
+
+            if new:
+                try:
+                    await db.execute(insert(Patient), [patient.model_dump() for _, patient in new])
+                    await bump_version(db, "patients")
+                    await db.commit()
+                    totals["inserted"] += len(new)
+                except IntegrityError:
+                    # Outro usuário cadastrou um dos CPFs entre a checagem e o INSERT
+                    await db.rollback()
+                    totals["errors"] += len(new)
+                    for number, patient in new:
+                        yield {"type": "error", "row": number, "message": "conflito ao gravar o bloco; importe de novo"}
+
+        yield {"type": "progress", **totals}
+
+    yield {"type": "done", **totals}
+
+
+def export_patients(db: AsyncSession, fmt: str) -> AsyncIterator[str]:
+    """Linhas do arquivo de exportação, lidas do banco em streaming."""
+    query = select(*[getattr(Patient, field) for field in FIELDS]).order_by(Patient.id)
+    return stream_export(db, query, FIELDS, fmt)
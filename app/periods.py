@@ -0,0 +1,24 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    # Inputs vazios do formulário HTMX chegam como ""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def day_range(day: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """Intervalo [00:00 do dia, 00:00 do dia seguinte) para buscas indexadas."""
+    day = day or date.today()
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def week_range(day: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """Intervalo da semana (segunda a domingo) que contém `day`."""
+    day = day or date.today()
+    start = datetime.combine(day - timedelta(days=day.weekday()), time.min)
+    return start, start + timedelta(days=7)
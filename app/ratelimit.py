@@ -0,0 +1,159 @@
+"""Limite de tentativas de login (janela deslizante por usuário e por IP).
+
+Cada tentativa é registrada com o seu horário; uma chave é bloqueada quando
+já tem ``limit`` tentativas dentro dos últimos ``window`` segundos. A checagem
+acontece antes de qualquer consulta ao banco ou verificação Argon2.
+
+Backends:
+
+- ``memory`` (padrão): por processo, suficiente com um único worker;
+- ``sqlite``: arquivo compartilhado (``RATE_LIMIT_DB``) entre os workers
+  da mesma máquina.
+
+Configuração: ``LOGIN_RATE_LIMIT_USER`` e ``LOGIN_RATE_LIMIT_IP`` no formato
+``tentativas/segundos`` (padrão ``5/300`` e ``60/300``; o do IP é mais alto
+porque a recepção costuma sair por um único IP).
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import time
+from collections import defaultdict, deque
+from threading import Lock
+from typing import Deque, Dict, List, Optional, Tuple
+
+# (chave, limite, janela em segundos)
+Check = Tuple[str, int, float]
+
+
+def parse_rate(value: str) -> Tuple[int, float]:
+    """'5/300' -> (5, 300.0)"""
+    limit, window = value.split("/")
+    return int(limit), float(window)
+
+
+class MemoryBackend:
+    # A cada N tentativas remove as chaves sem acertos recentes, para que
+    # uma varredura de nomes de usuário não cresça o dicionário sem limite
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._hits: Dict[str, Deque[float]] = defaultdict(deque)
+        self._lock = Lock()
+        self._calls = 0
+
+    def _sweep(self, now: float, window: float) -> None:
+        stale = [key for key, hits in self._hits.items() if not hits or hits[-1] <= now - window]
+        for key in stale:
+            del self._hits[key]
+
+    def try_acquire(self, checks: List[Check], now: float) -> Optional[float]:
+        with self._lock:
+            self._calls += 1
+            if self._calls % self.SWEEP_EVERY == 0:
+                self._sweep(now, max(window for _, _, window in checks))
+            retry_after = 0.0
+            for key, limit, window in checks:
+                hits = self._hits[key]
+                while hits and hits[0] <= now - window:
+                    hits.popleft()
+                if len(hits) >= limit:
+                    retry_after = max(retry_after, hits[0] + window - now)
+            if retry_after:
+                return retry_after
+            for key, _, _ in checks:
+                self._hits[key].append(now)
+            return None
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+class SQLiteBackend:
+    """Tentativas numa tabela SQLite; BEGIN IMMEDIATE serializa os workers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS login_attempts (key TEXT NOT NULL, ts REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_login_attempts_key_ts ON login_attempts (key, ts)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def try_acquire(self, checks: List[Check], now: float) -> Optional[float]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            retry_after = 0.0
+            for key, limit, window in checks:
+                conn.execute("DELETE FROM login_attempts WHERE key = ? AND ts <= ?", (key, now - window))
+                total, oldest = conn.execute(
+                    "SELECT count(*), min(ts) FROM login_attempts WHERE key = ?", (key,)
+                ).fetchone()
+                if total >= limit:
+                    retry_after = max(retry_after, oldest + window - now)
+            if not retry_after:
+                conn.executemany(
+                    "INSERT INTO login_attempts (key, ts) VALUES (?, ?)",
+                    [(key, now) for key, _, _ in checks],
+                )
+            conn.execute("COMMIT")
+            return retry_after or None
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def reset(self, key: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM login_attempts WHERE key = ?", (key,))
+        finally:
+            conn.close()
+
+
+class LoginRateLimiter:
+    def __init__(self, backend, user_rate: Tuple[int, float], ip_rate: Tuple[int, float]):
+        self.backend = backend
+        self.user_rate = user_rate
+        self.ip_rate = ip_rate
+
+    async def _call(self, method, *args):
+        # O backend SQLite faz I/O em disco: fica fora do event loop
+        if isinstance(self.backend, SQLiteBackend):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def check(self, username: str, ip: str) -> Optional[int]:
+        """Registra a tentativa; devolve os segundos de espera se bloqueada."""
+        checks = [
+            (f"user:{username.lower()}", *self.user_rate),
+            (f"ip:{ip}", *self.ip_rate),
+        ]
+        retry_after = await self._call(self.backend.try_acquire, checks, time.time())
+        return math.ceil(retry_after) if retry_after else None
+
+    async def reset_user(self, username: str) -> None:
+        """Login bem-sucedido zera o contador do usuário (o do IP continua)."""
+        await self._call(self.backend.reset, f"user:{username.lower()}")
+
+
+def _make_backend():
+    if os.getenv("RATE_LIMIT_BACKEND", "memory") == "sqlite":
+        return SQLiteBackend(os.getenv("RATE_LIMIT_DB", "rate_limit.db"))
+    return MemoryBackend()
+
+
+login_limiter = LoginRateLimiter(
+    _make_backend(),
+    user_rate=parse_rate(os.getenv("LOGIN_RATE_LIMIT_USER", "5/300")),
+    ip_rate=parse_rate(os.getenv("LOGIN_RATE_LIMIT_IP", "60/300")),
+)
@@ -0,0 +1,158 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import API_MAX_PAGE_SIZE, API_PAGE_SIZE, APIResponse, api_fields, page_body, parse_fields, project
+from app.auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    PasswordHasherBusy,
+    create_access_token,
+    verify_and_update_password,
+    verify_missing_user,
+)
+from app.deps import RoleChecker, get_db
+from app.lookups import list_specialties
+from app.models import Appointment, Employee, Patient, User
+from app.pagination import keyset_paginate
+from app.patient_io import format_cpf
+from app.periods import day_range, parse_date
+from app.ratelimit import login_limiter
+from app.schemas import AppointmentResponse, EmployeeResponse, PatientResponse
+
+# Rotas de dados (autenticadas em main.py, como os demais routers)
+router = APIRouter(prefix="/api/v1", tags=["API"], default_response_class=APIResponse)
+# Emissão de token para integrações: sem autenticação
+token_router = APIRouter(prefix="/api/v1", tags=["API"], default_response_class=APIResponse)
+
+allow_patient_manage = RoleChecker(["admin", "receptionist"])
+
+PATIENT_FIELDS = api_fields(Patient, PatientResponse)
+EMPLOYEE_FIELDS = api_fields(Employee, EmployeeResponse)
+APPOINTMENT_FIELDS = api_fields(Appointment, AppointmentResponse)
+
+PageSize = Query(API_PAGE_SIZE, ge=1, le=API_MAX_PAGE_SIZE)
+
+
+@token_router.post("/token")
+async def api_token(
+    request: Request,
+    username: str = Form(...),
+    password: str = Form(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """Token para o cabeçalho ``Authorization: Bearer <token>``."""
+    retry_after = await login_limiter.check(username, request.client.host if request.client else "-")
+    if retry_after:
+        return APIResponse(
+            {"detail": f"Muitas tentativas. Tente novamente em {retry_after} segundos."},
+            status_code=429, headers={"Retry-After": str(retry_after)},
+        )
+    user = await db.scalar(select(User).where(User.username == username))
+    valid, new_hash = False, None
+    try:
+        if user:
+            valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+        else:
+            await verify_missing_user(password)
+    except PasswordHasherBusy:
+        return APIResponse({"detail": "Servidor ocupado, tente novamente."}, status_code=503)
+    if not valid or not user.is_active:
+        return APIResponse({"detail": "Usuário ou senha inválidos."}, status_code=401)
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    await login_limiter.reset_user(username)
+    return APIResponse({
+        "access_token": create_access_token({"sub": user.username}),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    })
+
+
+# As listas devolvem APIResponse direto: retornar um dict faria o FastAPI
+# passar tudo por jsonable_encoder antes do orjson
+
+
+@router.get("/patients", dependencies=[Depends(allow_patient_manage)])
+async def api_list_patients(
+    fields: Optional[str] = None,
+    cpf: Optional[str] = None,
+    limit: int = PageSize,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    query = project(Patient, parse_fields(fields, PATIENT_FIELDS))
+    if cpf:
+        query = query.where(Patient.cpf == format_cpf(cpf))
+    page = await keyset_paginate(db, query, [Patient.id], limit, after=after, before=before)
+    return APIResponse(page_body(page))
+
+
+@router.get("/patients/{patient_id}", dependencies=[Depends(allow_patient_manage)])
+async def api_get_patient(patient_id: int, fields: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    row = (await db.execute(
+        project(Patient, parse_fields(fields, PATIENT_FIELDS)).where(Patient.id == patient_id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Paciente {patient_id} não existe.")
+    return APIResponse(row._asdict())
+
+
+@router.get("/employees")
+async def api_list_employees(
+    fields: Optional[str] = None,
+    role: Optional[str] = None,
+    specialty_id: Optional[int] = None,
+    limit: int = PageSize,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    query = project(Employee, parse_fields(fields, EMPLOYEE_FIELDS))
+    if role:
+        query = query.where(Employee.role == role)
+    if specialty_id is not None:
+        query = query.where(Employee.specialty_id == specialty_id)
+    page = await keyset_paginate(db, query, [Employee.id], limit, after=after, before=before)
+    return APIResponse(page_body(page))
+
+
+@router.get("/specialties")
+async def api_list_specialties(db: AsyncSession = Depends(get_db)):
+    # Lista pequena e em cache (app.lookups): sem paginação
+    return APIResponse({"data": [s.model_dump() for s in await list_specialties(db)]})
+
+
+@router.get("/appointments")
+async def api_list_appointments(
+    fields: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+    status: Optional[str] = None,
+    limit: int = PageSize,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Agendamentos em ordem de data; `start`/`end` (AAAA-MM-DD) inclusivos."""
+    # (date, id) é a chave do cursor: vem sempre na resposta
+    query = project(Appointment, parse_fields(fields, APPOINTMENT_FIELDS, required=("id", "date")))
+    start_day, end_day = parse_date(start), parse_date(end)
+    if start_day:
+        query = query.where(Appointment.date >= day_range(start_day)[0])
+    if end_day:
+        query = query.where(Appointment.date < day_range(end_day)[1])
+    if doctor_id is not None:
+        query = query.where(Appointment.doctor_id == doctor_id)
+    if patient_id is not None:
+        query = query.where(Appointment.patient_id == patient_id)
+    if status:
+        query = query.where(Appointment.status == status)
+    page = await keyset_paginate(db, query, [Appointment.date, Appointment.id], limit, after=after, before=before)
+    return APIResponse(page_body(page))
@@ -1,70 +1,286 @@
-from fastapi import APIRouter, Request, Depends, Form
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, Request, Depends, Form, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.availability import check_slot, find_free_slots
 from app.database import get_db
-from app.models import Appointment, Patient, Employee
+from app.models import Appointment, Employee, Patient
 from app.deps import templates, get_current_user
+from app.etag import ETagCheck
+from app.events import event_stream
+from app.live import APPOINTMENT_STATUSES, appointment_rows, publish_appointment
+from app.lookups import list_doctors, list_specialties, search_doctors, search_patients
+from app.pagination import keyset_paginate
+from app.periods import day_range, parse_date, week_range
+from app.stats import invalidate_stats
+from app.versions import bump_version
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 
-@router.get("")
-async def list_appointments(request: Request, db: Session = Depends(get_db)):
+
+@router.get("", dependencies=[Depends(ETagCheck("appointments", "patients", "employees", daily=True))])
+@router.get("/list", dependencies=[Depends(ETagCheck("appointments", "patients", "employees", daily=True))])
+async def list_appointments(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    period: str = None,
+    start: str = None,
+    end: str = None,
+    doctor_id: str = None,
+    status: str = None,
+    today: bool = False,
+    after: str = None,
+    before: str = None,
+    size: int = 20,
+):
     template_name = (
         "appointments/list_fragment.html" if request.headers.get('HX-request')
         else "appointments/list_full.html"
     )
-    appointments = db.query(Appointment).order_by(Appointment.date.asc()).all()
-    
-    # Tratamento simples para exibição amigável da data no template
-    for app in appointments:
-        app.display_date = app.date.replace("T", " ")
-        
+    # Só as colunas exibidas, com os nomes via JOIN: nada de carregar
+    # Patient/Employee inteiros (nem lazy load por linha no template)
+    query = appointment_rows()
+
+    # Janela de datas: ?today=true (dashboard), ?period=today|week ou
+    # ?start=&end=; sem nada, lista os próximos a partir de hoje
+    if today:
+        period = "today"
+    ranges = {"today": day_range, "week": week_range}
+    start_date, end_date = parse_date(start), parse_date(end)
+    if period in ranges:
+        window_start, window_end = ranges[period]()
+    elif start_date or end_date:
+        window_start = day_range(start_date)[0] if start_date else None
+        window_end = day_range(end_date)[1] if end_date else None
+    else:
+        window_start, window_end = day_range()[0], None
+    if window_start:
+        query = query.where(Appointment.date >= window_start)
+    if window_end:
+        query = query.where(Appointment.date < window_end)
+
+    if doctor_id and doctor_id.isdigit():
+        query = query.where(Appointment.doctor_id == int(doctor_id))
+    if status in APPOINTMENT_STATUSES:
+        query = query.where(Appointment.status == status)
+
+    result_page = await keyset_paginate(
+        db, query, [Appointment.date, Appointment.id], size, after=after, before=before
+    )
+
+    if today:
+        # Bloco "Agenda de Hoje" do dashboard
+        return templates.TemplateResponse("appointments/partials/today_list.html", {
+            "request": request,
+            "appointments": result_page.items,
+        })
+
+    # Filtros ativos repassados aos links de paginação
+    filters = {
+        key: value for key, value in {
+            "period": period, "start": start, "end": end,
+            "doctor_id": doctor_id, "status": status,
+        }.items() if value
+    }
+    doctors = await list_doctors(db)
+
     return templates.TemplateResponse(template_name, {
         "request": request,
-        "appointments": appointments
+        "appointments": result_page.items,
+        "period": period,
+        "filters": filters,
+        "filter_query": urlencode(filters),
+        "doctors": doctors,
+        "statuses": APPOINTMENT_STATUSES,
+        "has_next": result_page.next_cursor is not None,
+        "has_prev": result_page.prev_cursor is not None,
+        "next_cursor": result_page.next_cursor,
+        "prev_cursor": result_page.prev_cursor,
     })
 
 @router.get("/new")
-async def new_appointment(request: Request, db: Session = Depends(get_db)):
+async def new_appointment(request: Request, db: AsyncSession = Depends(get_db)):
     template_name = (
         "appointments/form_fragment.html" if request.headers.get('HX-request')
         else "appointments/form_full.html"
     )
-    patients = db.query(Patient).all()
-    doctors = db.query(Employee).filter(Employee.role == "doctor").all()
+    # Paciente e médico são escolhidos por typeahead (/appointments/lookup/*)
     return templates.TemplateResponse(template_name, {
         "request": request,
-        "patients": patients,
-        "doctors": doctors
+        "specialties": await list_specialties(db),
+    })
+
+
+@router.get("/slots", response_class=HTMLResponse)
+async def free_slots(
+    request: Request,
+    specialty_id: Optional[int] = None,
+    start: Optional[str] = None,
+    days: int = 14,
+    db: AsyncSession = Depends(get_db),
+):
+    """Próximos horários livres dos médicos de uma especialidade."""
+    slots = await find_free_slots(db, specialty_id, parse_date(start), days) if specialty_id else []
+    return templates.TemplateResponse("appointments/partials/free_slots.html", {
+        "request": request,
+        "slots": slots,
+        "searched": specialty_id is not None,
+    })
+
+
+@router.get("/lookup/patients", response_class=HTMLResponse)
+async def lookup_patients(request: Request, q: str = "", db: AsyncSession = Depends(get_db)):
+    patients = await search_patients(db, q)
+    return templates.TemplateResponse("appointments/partials/lookup_options.html", {
+        "request": request,
+        "field": "patient",
+        "options": [{"id": p.id, "label": p.name, "detail": p.cpf} for p in patients],
+        "term": q,
     })
 
+
+@router.get("/lookup/doctors", response_class=HTMLResponse)
+async def lookup_doctors(request: Request, q: str = "", db: AsyncSession = Depends(get_db)):
+    doctors = await search_doctors(db, q)
+    return templates.TemplateResponse("appointments/partials/lookup_options.html", {
+        "request": request,
+        "field": "doctor",
+        "options": [
+            {"id": d.id, "label": f"Dr(a). {d.name}", "detail": d.specialty} for d in doctors
+        ],
+        "term": q,
+    })
+
+async def _form_with_error(request: Request, db: AsyncSession, appointment: Appointment, erro: str):
+    # Devolve o formulário preenchido, com os nomes nos campos de busca
+    patient = await db.get(Patient, appointment.patient_id) if appointment.patient_id else None
+    doctor = await db.get(Employee, appointment.doctor_id) if appointment.doctor_id else None
+    return templates.TemplateResponse("appointments/form_fragment.html", {
+        "request": request,
+        "appointment": appointment,
+        "patient_label": patient.name if patient else "",
+        "doctor_label": f"Dr(a). {doctor.name}" if doctor else "",
+        "specialties": await list_specialties(db),
+        "erro": erro,
+    })
+
+
+def _parse(convert, value: str):
+    """`convert(value)`, ou None se vazio ou inválido."""
+    try:
+        return convert(value) if value else None
+    except ValueError:
+        return None
+
+
+def _invalid_fields(appointment: Appointment) -> Optional[str]:
+    if appointment.patient_id is None:
+        return "Selecione o paciente na lista de busca."
+    if appointment.doctor_id is None:
+        return "Selecione o médico na lista de busca."
+    if appointment.date is None:
+        return "Informe uma data e hora válidas."
+    if appointment.cost is None:
+        return "Informe um valor válido."
+    return None
+
+
 @router.post("/save")
 async def save_appointment(
     request: Request,
-    patient_id: int = Form(...),
-    doctor_id: int = Form(...),
-    date: str = Form(...), # Recebe 'YYYY-MM-DDTHH:MM' do input
-    cost: float = Form(0.0),
+    # Recebidos como texto: a busca sem opção escolhida manda os ids vazios,
+    # e um 422 do FastAPI não aparece na tela (o htmx ignora erros)
+    patient_id: str = Form(""),
+    doctor_id: str = Form(""),
+    date: str = Form(""), # Recebe 'YYYY-MM-DDTHH:MM' do input
+    cost: str = Form(""),
     notes: str = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # O SQLite armazenará a string exatamente como vem do input datetime-local
     new_app = Appointment(
-        patient_id=patient_id,
-        doctor_id=doctor_id,
-        date=date,
-        cost=cost,
+        patient_id=_parse(int, patient_id),
+        doctor_id=_parse(int, doctor_id),
+        date=_parse(datetime.fromisoformat, date),
+        cost=_parse(float, cost or "0"),
         notes=notes,
         status="scheduled"
     )
-    db.add(new_app)
-    db.commit()
-    
-    return await list_appointments(request, db)
-
-@router.post("/update-status/{app_id}")
-async def update_status(app_id: int, status: str = Form(...), db: Session = Depends(get_db)):
-    app = db.query(Appointment).filter(Appointment.id == app_id).first()
-    if app:
-        app.status = status
-        db.commit()
-    return Response(headers={"HX-Refresh": "true"}) # Recarrega a lista para aplicar cores
\ No newline at end of file
+    erro = _invalid_fields(new_app) or await check_slot(db, new_app.doctor_id, new_app.date)
+    if not erro:
+        try:
+            db.add(new_app)
+            await bump_version(db, "appointments")
+            await db.commit()
+        except IntegrityError:
+            # Outra marcação no mesmo horário entrou depois da checagem
+            await db.rollback()
+            erro = "Este horário acabou de ser ocupado. Escolha outro."
+    if erro:
+        return await _form_with_error(request, db, new_app, erro)
+    invalidate_stats()
+    row = await publish_appointment(db, new_app.id)
+
+    # Formulário limpo para a próxima marcação e a confirmação por
+    # hx-swap-oob, sem refazer a agenda inteira
+    return templates.TemplateResponse("appointments/form_fragment.html", {
+        "request": request,
+        "specialties": await list_specialties(db),
+        "flash": f"Consulta de {row.patient_name} com Dr(a). {row.doctor_name} "
+                 f"marcada para {row.date:%d/%m/%Y %H:%M}.",
+    })
+
+@router.post("/update-status/{app_id}", response_class=HTMLResponse)
+async def update_status(request: Request, app_id: int, status: str = Form(...), db: AsyncSession = Depends(get_db)):
+    app = await db.get(Appointment, app_id)
+    if not app or status not in APPOINTMENT_STATUSES:
+        return Response(status_code=404 if not app else 422)
+    erro = None
+    if app.status != status:
+        if app.status == "canceled":
+            # Reativação: o horário pode ter sido ocupado depois do cancelamento
+            erro = await check_slot(db, app.doctor_id, app.date, exclude_id=app.id)
+        if not erro:
+            app.status = status
+            try:
+                await bump_version(db, "appointments")
+                await db.commit()
+                invalidate_stats()
+            except IntegrityError:
+                # Outra marcação no mesmo horário entrou depois da checagem
+                await db.rollback()
+                erro = "Este horário acabou de ser ocupado."
+    if erro:
+        # Linha sem alteração (o select volta ao status atual) e o motivo
+        row = (await db.execute(appointment_rows().where(Appointment.id == app_id))).first()
+        return templates.TemplateResponse("appointments/partials/row.html", {
+            "request": request,
+            "app": row,
+            "statuses": APPOINTMENT_STATUSES,
+            "flash": f"Não foi possível reativar a consulta de {row.patient_name}. {erro}",
+            "flash_level": "danger",
+        })
+    # A mesma linha vai para os outros clientes pelo SSE; quem alterou recebe
+    # só a linha, em vez de recarregar a página
+    row = await publish_appointment(db, app_id)
+    return templates.TemplateResponse("appointments/partials/row.html", {
+        "request": request,
+        "app": row,
+        "statuses": APPOINTMENT_STATUSES,
+        "flash": f"Status da consulta de {row.patient_name} atualizado.",
+    })
+
+
+@router.get("/events")
+async def appointment_events(request: Request):
+    """Mudanças de agendamento ao vivo (Server-Sent Events)."""
+    return StreamingResponse(
+        event_stream(request),
+        media_type="text/event-stream",
+        # Sem cache e sem buffer no proxy (nginx), para cada evento sair na hora
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, Form, Request, Response
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import create_access_token, verify_password
+from app.auth import PasswordHasherBusy, create_access_token, verify_and_update_password
 from app.deps import get_db, templates
 from app.models import User
+from app.ratelimit import login_limiter
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -21,23 +23,50 @@ async def login(
     response: Response,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
+    # Antes de tocar no banco ou no Argon2: tentativas demais por usuário/IP
+    retry_after = await login_limiter.check(username, request.client.host if request.client else "-")
+    if retry_after:
+        return templates.TemplateResponse(
+            "auth/login.html",
+            {
+                "request": request,
+                "error": f"Muitas tentativas. Tente novamente em {retry_after} segundos.",
+            },
+            status_code=429,
+            headers={"Retry-After": str(retry_after)},
+        )
+
     try:
-        user = db.query(User).filter(User.username == username).first()
+        user = await db.scalar(select(User).where(User.username == username))
         if not user:
             return templates.TemplateResponse(
                 "auth/login.html", {"request": request, "error": "Usuário Não existe."}
             )
-        if user and not verify_password(password, user.hashed_password):
+        # Uma única verificação, fora do event loop
+        try:
+            valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+        except PasswordHasherBusy:
+            return templates.TemplateResponse(
+                "auth/login.html",
+                {"request": request, "error": "Servidor ocupado, tente novamente."},
+                status_code=503,
+            )
+        if not valid:
             return templates.TemplateResponse(
                 "auth/login.html", {"request": request, "error": "Senha inválida."}
             )
-        if user and verify_password(password, user.hashed_password) and not user.is_active:
+        if not user.is_active:
             return templates.TemplateResponse(
                 "auth/login.html", {"request": request, "error": "Usuário desativado."}
             )
+        if new_hash:
+            # Parâmetros do Argon2 mudaram: regrava o hash com a senha já conferida
+            user.hashed_password = new_hash
+            await db.commit()
 
+        await login_limiter.reset_user(username)
         token = create_access_token({"sub": user.username})
 
         # Criamos a resposta e setamos o Cookie
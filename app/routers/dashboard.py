@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.deps import get_db, templates
+from app.stats import dashboard_stats
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("/stats")
+async def stats(request: Request, db: AsyncSession = Depends(get_db)):
+    data = await dashboard_stats(db)
+    # O dashboard faz polling via HTMX e recebe os cards prontos;
+    # fora do HTMX a rota responde JSON
+    if request.headers.get("HX-Request"):
+        return templates.TemplateResponse(
+            "home/partials/stats.html", {"request": request, "stats": data}
+        )
+    return data
@@ -1,44 +1,62 @@
-from datetime import datetime
+from datetime import datetime, time
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Form, Request, Response
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.deps import get_db, templates
-from app.models import Employee, Specialty, User
-from app.schemas import EmployeeCreate, EmployeeResponse, SpecialtyResponse
+from app.availability import WEEKDAYS, doctor_week
+from app.deps import get_db, invalidate_user_cache, templates
+from app.etag import ETagCheck
+from app.lookups import list_specialties
+from app.pagination import cached_count, invalidate_count, keyset_paginate
+from app.models import DoctorSchedule, Employee, User
+from app.rows import EmployeeRow, as_rows, employee_rows
+from app.schemas import EmployeeCreate, EmployeeResponse
+from app.versions import bump_version
 
 router = APIRouter(prefix="/employees", tags=["Employees"])
 
 
-@router.get("", response_class=HTMLResponse)
+async def _bump_employees(db: AsyncSession):
+    # Funcionários aparecem na lista de médicos (lookups) e nos agendamentos
+    await bump_version(db, "employees")
+    await bump_version(db, "doctors")
+
+
+@router.get("", response_class=HTMLResponse, dependencies=[Depends(ETagCheck("employees", "specialties"))])
 async def list_employees(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     page: int = 1,
     size:int = 5,
     success: str = None,
-    error: str = None
+    error: str = None,
+    after: str = None,
+    before: str = None
 ):
-    offset = (page - 1) * size
-    total_count = db.query(Employee).count()
-    employees = db.query(Employee).options(joinedload(Employee.specialty_data)).offset(offset).limit(size).all()
+    result_page = await keyset_paginate(
+        db, employee_rows(), [Employee.id], size,
+        after=after, before=before, offset=0 if after or before else (page - 1) * size
+    )
+    total_count = await cached_count(db, "employees", select(Employee.id))
     total_pages = (total_count + size - 1) // size
     template = (
         "employees/list_fragment.html"
         if request.headers.get("HX-Request")
         else "employees/list_full.html"
     )
-    result = [EmployeeResponse.model_validate(p) for p in employees]
     return templates.TemplateResponse(
         template, {
             "request": request,
-            "employees": result,
+            "employees": as_rows(EmployeeRow, result_page.items),
             "current_page": page,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1,
+            "has_next": result_page.next_cursor is not None,
+            "has_prev": result_page.prev_cursor is not None,
+            "next_cursor": result_page.next_cursor,
+            "prev_cursor": result_page.prev_cursor,
             "success": success,
             "error": error
         }
@@ -46,10 +64,9 @@ async def list_employees(
 
 
 @router.get("/new", response_class=HTMLResponse)
-async def form_employee(request: Request, db: Session = Depends(get_db)):
+async def form_employee(request: Request, db: AsyncSession = Depends(get_db)):
     is_htmx = request.headers.get("HX-request")
-    specialties = db.query(Specialty).all()
-    result_specialties = [SpecialtyResponse.model_validate(s) for s in specialties]
+    result_specialties = await list_specialties(db)
     template_name = (
         "employees/form_fragment.html" if request.headers.get("HX-request")
         else "employees/form_full.html")
@@ -59,8 +76,8 @@ async def form_employee(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/edit/{emp_id}", response_class=HTMLResponse)
-async def edit_employee(emp_id: int, request: Request, db: Session = Depends(get_db)):
-    employee = db.query(Employee).filter(Employee.id == emp_id).first()
+async def edit_employee(emp_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    employee = await db.get(Employee, emp_id)
     if not employee:
         template_name = (
             "components/notfound_error.html" if request.headers.get("HX-request")
@@ -77,10 +94,7 @@ async def edit_employee(emp_id: int, request: Request, db: Session = Depends(get
             },
         )
 
-    specialties = (
-        db.query(Specialty).all() if employee.role == "doctor" else []
-    )
-    result_specialties = [SpecialtyResponse.model_validate(s) for s in specialties] if specialties else []
+    result_specialties = await list_specialties(db) if employee.role == "doctor" else []
     template_name = (
         "employees/form_fragment.html" if request.headers.get("HX-request")
         else "employees/form_full.html"
@@ -93,10 +107,9 @@ async def edit_employee(emp_id: int, request: Request, db: Session = Depends(get
 
 # 3. RENDERIZAÇÃO DINÂMICA DE CAMPOS (O "PULO DO GATO" DO HTMX)
 @router.get("/render-fields")
-async def render_fields(request: Request, role: str, db: Session = Depends(get_db)):
+async def render_fields(request: Request, role: str, db: AsyncSession = Depends(get_db)):
     if role == "doctor":
-        specialties = db.query(Specialty).all()
-        result_specialties = [SpecialtyResponse.model_validate(s) for s in specialties]
+        result_specialties = await list_specialties(db)
 
         return templates.TemplateResponse(
             "employees/partials/fields_medical.html",
@@ -121,7 +134,7 @@ async def save_employee(
     crm: Optional[str] = Form(None),
     specialty_id: Optional[int] = Form(None),
     department: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     employee_request = EmployeeCreate(
         name=name,
@@ -144,7 +157,7 @@ async def save_employee(
             department=department if employee_request.role in ["receptionist", "admin"] else None,
         )
         
-        exists_cpf = db.query(Employee).filter(Employee.cpf == cpf).first()
+        exists_cpf = await db.scalar(select(Employee).where(Employee.cpf == cpf))
         if exists_cpf:
             return templates.TemplateResponse(
                 "employees/form_fragment.html", {
@@ -156,13 +169,15 @@ async def save_employee(
 
         try:
             db.add(new_employee)
-            db.commit()
+            await _bump_employees(db)
+            await db.commit()
+            invalidate_count("employees")
             response = await list_employees(request, db, success="Funcionário cadastrado com sucesso.")  # Retorna a lista atualizada
             response.headers['HX-Push-Url'] = "/employees"
             return response
         
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             return templates.TemplateResponse(
                 "employees/form_fragment.html",
                 {
@@ -172,9 +187,9 @@ async def save_employee(
                 },
             )
     try:
-        db_employee = db.query(Employee).filter(Employee.id == int(employee_id)).first()
+        db_employee = await db.get(Employee, int(employee_id))
         if db_employee:
-            exists_cpf = db.query(Employee).filter(Employee.cpf == cpf).first()
+            exists_cpf = await db.scalar(select(Employee).where(Employee.cpf == cpf))
             if (cpf != db_employee.cpf and not exists_cpf) or (cpf == db_employee.cpf and exists_cpf):
                 db_employee.name = employee_request.name
                 db_employee.cpf = employee_request.cpf
@@ -183,7 +198,10 @@ async def save_employee(
                 db_employee.crm = crm if employee_request.role == "doctor" else None
                 db_employee.specialty_id = specialty_id if employee_request.role == "doctor" else None
                 db_employee.department = department if employee_request.role != "doctor" else None
-                db.commit()
+                await _bump_employees(db)
+                await db.commit()
+                # O cargo define as permissões guardadas no cache de autenticação
+                invalidate_user_cache(employee_id=db_employee.id)
                 response = await list_employees(request, db, success="Funcionário atualizado com sucesso.")
                 response.headers["HX-Push-Url"] = "/employees"
                 return response
@@ -200,7 +218,7 @@ async def save_employee(
                 }
             )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         template_name = (
             "components/notfound_error.html" if request.headers.get("HX-request")
             else "components/notfound_error_page.html"
@@ -216,13 +234,88 @@ async def save_employee(
         
 
 
+def _parse_time(value: Optional[str]) -> Optional[time]:
+    try:
+        return time.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+async def _render_schedule(request: Request, db: AsyncSession, doctor: Employee, **context):
+    week = await doctor_week(db, doctor.id)
+    template_name = (
+        "employees/schedule_fragment.html" if request.headers.get("HX-request")
+        else "employees/schedule_full.html"
+    )
+    return templates.TemplateResponse(template_name, {
+        "request": request,
+        "employee": doctor,
+        "weekdays": list(enumerate(WEEKDAYS)),
+        "week": week,
+        "slot_minutes": next(iter(week.values())).slot_minutes if week else 30,
+        **context,
+    })
+
+
+@router.get("/schedule/{emp_id}", response_class=HTMLResponse)
+async def edit_schedule(emp_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    doctor = await db.get(Employee, emp_id)
+    if not doctor or doctor.role != "doctor":
+        return templates.TemplateResponse("components/notfound_error.html", {
+            "request": request,
+            "message": f"Não existe nenhum médico com o ID {emp_id}.",
+            "return_point": "/employees",
+            "return_page": "a Lista de Funcionários",
+        })
+    return await _render_schedule(request, db, doctor)
+
+
+@router.post("/schedule/{emp_id}", response_class=HTMLResponse)
+async def save_schedule(emp_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    doctor = await db.get(Employee, emp_id)
+    if not doctor or doctor.role != "doctor":
+        return Response(status_code=404)
+
+    form = await request.form()
+    try:
+        slot_minutes = int(form.get("slot_minutes") or 30)
+    except ValueError:
+        slot_minutes = 0
+    if not 5 <= slot_minutes <= 240:
+        return await _render_schedule(request, db, doctor, erro="Duração da consulta deve ficar entre 5 e 240 minutos.")
+
+    periods = []
+    for weekday, label in enumerate(WEEKDAYS):
+        if not form.get(f"active_{weekday}"):
+            continue
+        start, end = _parse_time(form.get(f"start_{weekday}")), _parse_time(form.get(f"end_{weekday}"))
+        if not start or not end or start >= end:
+            return await _render_schedule(request, db, doctor, erro=f"{label}: o início deve ser antes do fim.")
+        periods.append(DoctorSchedule(
+            doctor_id=doctor.id, weekday=weekday, start_time=start, end_time=end, slot_minutes=slot_minutes
+        ))
+    if not periods:
+        return await _render_schedule(request, db, doctor, erro="Marque ao menos um dia de atendimento.")
+
+    await db.execute(delete(DoctorSchedule).where(DoctorSchedule.doctor_id == doctor.id))
+    db.add_all(periods)
+    await bump_version(db, "doctor_schedules")
+    await db.commit()
+    return await _render_schedule(request, db, doctor, success="Agenda do médico atualizada.")
+
+
 @router.delete("/delete/{emp_id}")
-async def delete_employee(emp_id: int, db: Session = Depends(get_db)):
-    emp = db.query(Employee).filter(Employee.id == emp_id).first()
+async def delete_employee(emp_id: int, db: AsyncSession = Depends(get_db)):
+    emp = await db.get(Employee, emp_id)
     if emp:
-        user = db.query(User).filter(User.employee_id == emp.id).first()
+        user = await db.scalar(select(User).where(User.employee_id == emp.id))
         if user:
-            db.delete(user)
-        db.delete(emp)
-        db.commit()
+            await db.delete(user)
+        await db.execute(delete(DoctorSchedule).where(DoctorSchedule.doctor_id == emp.id))
+        await db.delete(emp)
+        await _bump_employees(db)
+        await bump_version(db, "users")
+        await db.commit()
+        invalidate_count("employees")
+        invalidate_user_cache(employee_id=emp_id)
     return Response(status_code=200)
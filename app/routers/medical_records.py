@@ -1,10 +1,24 @@
 from datetime import datetime
+from typing import Optional
+
 from fastapi import APIRouter, Depends, Form, Request, Response
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload, raiseload
 
-from app.deps import templates, get_db, RoleChecker
-from app.models import Appointment, MedicalRecord, Patient
+from app.database import AsyncReadSessionLocal
+from app.deps import templates, get_db, get_write_db, RoleChecker
+from app.etag import ETagCheck
+from app.export import FORMATS, export_format, stream_export
+from app.live import appointment_rows, publish_appointment, queue_count, queue_filter
+from app.lookups import list_doctors
+from app.periods import day_range, parse_date
+from app.pagination import cached_count, invalidate_count, keyset_paginate
+from app.search import index_medical_record, search_filter
+from app.stats import invalidate_stats
+from app.versions import bump_version
+from app.models import Appointment, Employee, MedicalRecord, Patient
 # Supondo que você tenha esses schemas para validação
 # from app.schemas import MedicalRecordCreate 
 
@@ -13,22 +27,26 @@ router = APIRouter(prefix="/consultations", tags=["Consultations"])
 # Apenas médicos podem acessar esta rota
 allow_doctor = RoleChecker(["doctor", "admin"])
 
-@router.get("", response_class=HTMLResponse, dependencies=[Depends(allow_doctor)])
+@router.get("", response_class=HTMLResponse, dependencies=[
+    Depends(allow_doctor), Depends(ETagCheck("appointments", "patients", daily=True))
+])
 async def list_consultations(
     request: Request, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     success: str = ''
 ):
     # Obtém o ID do funcionário/médico logado através do estado do request (setado no auth)
     doctor_id = request.state.user.employee_id
-    today = datetime.now().strftime("%Y-%m-%d")
     
     # Filtra pacientes agendados para HOJE que estão esperando ou em atendimento
-    appointments = db.query(Appointment).filter(
-        Appointment.doctor_id == doctor_id,
-        Appointment.date.contains(today),
-        Appointment.status.in_(["scheduled", "waiting", "in_progress"])
-    ).order_by(Appointment.date.asc()).all()
+    # Mesmas colunas do evento ao vivo (app.live), para o item da fila ser
+    # o mesmo parcial na carga da página e nas atualizações
+    result = await db.execute(
+        appointment_rows()
+        .where(queue_filter(doctor_id))
+        .order_by(Appointment.date.asc())
+    )
+    appointments = result.all()
     
     template_name = ("consultations/list_consultations_fragment.html" if request.headers.get("HX-request")
                      else "consultations/list_consultations_full.html")
@@ -43,24 +61,44 @@ async def list_consultations(
         }
     )
 
-@router.get("/history", response_class=HTMLResponse)
+@router.get("/history", response_class=HTMLResponse, dependencies=[
+    Depends(ETagCheck("medical_records", "appointments", "patients", "employees"))
+])
 async def list_medical_history(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     page: int = 1,
     size: int = 10,
-    search: str = ""
+    search: str = "",
+    after: str = None,
+    before: str = None
 ):
-    offset = (page - 1) * size
-    
     # Query base unindo prontuário com agendamento e paciente
-    query = db.query(MedicalRecord).join(Appointment).join(Patient)
+    query = select(MedicalRecord).join(Appointment).join(Patient)
     
-    if search:
-        query = query.filter(Patient.name.contains(search) | Patient.cpf.contains(search))
+    # Busca pelo índice FTS (nome, CPF, diagnóstico, queixa e CID) em vez de LIKE '%x%'
+    matches = search_filter(db, search) if search else None
+    if matches is not None:
+        query = query.where(MedicalRecord.id.in_(matches))
     
-    total_count = query.count()
-    records = query.order_by(MedicalRecord.created_at.desc()).offset(offset).limit(size).all()
+    # Mais recentes primeiro; o id desempata registros com o mesmo created_at
+    result_page = await keyset_paginate(
+        db,
+        query.options(
+            # Atendimento e paciente já estão no JOIN da consulta; só o médico
+            # entra por joinedload
+            contains_eager(MedicalRecord.appointment).contains_eager(Appointment.patient),
+            contains_eager(MedicalRecord.appointment).joinedload(Appointment.doctor),
+            raiseload("*"),
+        ),
+        [MedicalRecord.created_at, MedicalRecord.id],
+        size,
+        after=after,
+        before=before,
+        descending=True,
+        offset=0 if after or before else (page - 1) * size,
+    )
+    total_count = await cached_count(db, "history", query, search)
     total_pages = (total_count + size - 1) // size
     
     template_name = ("consultations/history_fragment.html" if request.headers.get("HX-request")
@@ -70,18 +108,89 @@ async def list_medical_history(
         template_name,
         {
             "request": request,
-            "records": records,
+            "records": result_page.items,
             "current_page": page,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1,
-            "search": search
+            "has_next": result_page.next_cursor is not None,
+            "has_prev": result_page.prev_cursor is not None,
+            "next_cursor": result_page.next_cursor,
+            "prev_cursor": result_page.prev_cursor,
+            "search": search,
+            "doctors": await list_doctors(db),
         }
     )
 
+
+# Colunas do arquivo de auditoria, na ordem do select de export_query
+EXPORT_FIELDS = [
+    "record_id", "created_at", "appointment_date", "patient_name", "patient_cpf",
+    "doctor_name", "doctor_crm", "cid_code", "chief_complaint", "physical_exam",
+    "diagnosis", "prescription", "medical_certificate",
+]
+
+
+def export_query(start: Optional[str] = None, end: Optional[str] = None,
+                 doctor_id: Optional[str] = None, cid: str = ""):
+    """Consulta da exportação de prontuários; todos os filtros são opcionais."""
+    # Colunas projetadas (sem entidades do ORM) e JOINs explícitos: uma única
+    # consulta, lida do banco em lotes
+    query = (
+        select(
+            MedicalRecord.id, MedicalRecord.created_at, Appointment.date,
+            Patient.name, Patient.cpf, Employee.name, Employee.crm,
+            MedicalRecord.cid_code, MedicalRecord.chief_complaint, MedicalRecord.physical_exam,
+            MedicalRecord.diagnosis, MedicalRecord.prescription, MedicalRecord.medical_certificate,
+        )
+        .join(Appointment, MedicalRecord.appointment_id == Appointment.id)
+        .join(Patient, Appointment.patient_id == Patient.id)
+        .join(Employee, Appointment.doctor_id == Employee.id)
+        .order_by(Appointment.date, MedicalRecord.id)
+    )
+    start_date, end_date = parse_date(start), parse_date(end)
+    if start_date:
+        query = query.where(Appointment.date >= day_range(start_date)[0])
+    if end_date:
+        # Data final inclusiva
+        query = query.where(Appointment.date < day_range(end_date)[1])
+    if doctor_id and doctor_id.isdigit():
+        query = query.where(Appointment.doctor_id == int(doctor_id))
+    if cid.strip():
+        # "G44" encontra G44, G44.2, ...
+        query = query.where(MedicalRecord.cid_code.startswith(cid.strip().upper(), autoescape=True))
+    return query
+
+
+@router.get("/export", dependencies=[Depends(allow_doctor)])
+async def export_medical_records(
+    format: str = "csv",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    doctor_id: Optional[str] = None,
+    cid: str = "",
+):
+    fmt = export_format(format)
+    query = export_query(start, end, doctor_id, cid)
+
+    async def lines():
+        # Sessão própria: a do Depends(get_db) já foi fechada quando o streaming roda
+        async with AsyncReadSessionLocal() as db:
+            async for chunk in stream_export(db, query, EXPORT_FIELDS, fmt):
+                yield chunk
+
+    filename = f"prontuarios-{datetime.now():%Y%m%d}.{fmt}"
+    return StreamingResponse(
+        lines(),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.get("/view/{record_id}", response_class=HTMLResponse)
-async def view_medical_record(request: Request, record_id: int, db: Session = Depends(get_db)):
-    record = db.query(MedicalRecord).filter(MedicalRecord.id == record_id).first()
+async def view_medical_record(request: Request, record_id: int, db: AsyncSession = Depends(get_db)):
+    record = await db.scalar(
+        select(MedicalRecord)
+        .options(joinedload(MedicalRecord.appointment).joinedload(Appointment.patient))
+        .where(MedicalRecord.id == record_id)
+    )
     
     if not record:
         return templates.TemplateResponse("components/not_found_error.html", {"request": request})
@@ -98,9 +207,13 @@ async def view_medical_record(request: Request, record_id: int, db: Session = De
 async def start_consultation(
     request: Request, 
     appointment_id: int, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = await db.scalar(
+        select(Appointment)
+        .options(joinedload(Appointment.patient))
+        .where(Appointment.id == appointment_id)
+    )
     
     if not appointment:
         return templates.TemplateResponse("components/not_found_error.html", {"request": request})
@@ -108,7 +221,10 @@ async def start_consultation(
     # Se o paciente estava apenas agendado ou esperando, muda para 'em progresso'
     if appointment.status in ["scheduled", "waiting"]:
         appointment.status = "in_progress"
-        db.commit()
+        await bump_version(db, "appointments")
+        await db.commit()
+        invalidate_stats()
+        await publish_appointment(db, appointment.id)
 
     return templates.TemplateResponse(
         "consultations/partials/consultation_form.html",
@@ -129,8 +245,23 @@ async def save_medical_record(
     prescription: str = Form(...),
     cid_code: str = Form(None),
     medical_certificate: str = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    appointment = await db.scalar(
+        select(Appointment)
+        .options(joinedload(Appointment.patient))
+        .where(Appointment.id == appointment_id)
+    )
+    if appointment is None:
+        # O formulário fica na tela; só o aviso entra, por hx-swap-oob
+        return templates.TemplateResponse(
+            "components/flash.html",
+            {"request": request, "flash": "Consulta não encontrada.", "flash_level": "danger"},
+            status_code=404,
+            headers={"HX-Reswap": "none"},
+        )
+    flash = f"Atendimento de {appointment.patient.name} finalizado com sucesso."
+
     try:
         # 1. Cria o registro médico (Prontuário)
         new_record = MedicalRecord(
@@ -144,31 +275,45 @@ async def save_medical_record(
         )
         
         # 2. Atualiza o status do agendamento para concluído
-        appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
-        if appointment:
-            appointment.status = "completed"
+        appointment.status = "completed"
         
         db.add(new_record)
-        db.commit()
-
-        # Retorna para a lista de consultas com push url
-        response = await list_consultations(
-            request, 
-            db, 
-            success=f"Atendimento de {appointment.patient.name} finalizado com sucesso."
-        )
-        response.headers['HX-Push-Url'] = '/consultations'
-        return response
-
+        await db.flush()
+        await index_medical_record(db, new_record.id)
+        await bump_version(db, "medical_records")
+        await bump_version(db, "appointments")
+        await db.commit()
     except Exception as e:
-        db.rollback()
-        appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+        await db.rollback()
+        appointment = await db.scalar(
+            select(Appointment)
+            .options(joinedload(Appointment.patient))
+            .where(Appointment.id == appointment_id)
+        )
         return templates.TemplateResponse(
-            "consultations/consultation_form.html",
+            "consultations/partials/consultation_form.html",
             {
                 "request": request,
                 "appointment": appointment,
                 "now": datetime.now(),
                 "erro": f"Erro ao salvar prontuário: {str(e)}"
             }
-        )
\ No newline at end of file
+        )
+
+    # Prontuário gravado: daqui em diante nada volta ao formulário de erro
+    invalidate_stats()
+    invalidate_count("history")
+    await publish_appointment(db, appointment_id)
+
+    # Só a área do atendimento volta ao estado inicial; o item sai da fila
+    # e o contador é atualizado por hx-swap-oob, sem recarregar a fila
+    remaining = await queue_count(db, request.state.user.employee_id)
+    return templates.TemplateResponse(
+        "consultations/partials/record_saved.html",
+        {
+            "request": request,
+            "appointment_id": appointment_id,
+            "queue_count": remaining,
+            "flash": flash,
+        }
+    )
\ No newline at end of file
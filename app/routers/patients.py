@@ -1,14 +1,28 @@
+import json
+import shutil
+import tempfile
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Form, Request, Response
-from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, Form, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.deps import templates
 from app.models import Patient
 from app.schemas import PatientResponse, PatientCreate
 
+from app.database import AsyncReadSessionLocal, AsyncSessionLocal
 from app.deps import get_db, RoleChecker
+from app.etag import ETagCheck
+from app.pagination import cached_count, invalidate_count, keyset_paginate
+from app.rows import PatientRow, as_rows, patient_rows
+from app.export import FORMATS, export_format
+from app.patient_io import detect_format, export_patients, import_patients, read_rows
+from app.stats import invalidate_stats
+from app.search import reindex_patient
+from app.versions import bump_version
 
 SIZE = 5
 
@@ -16,34 +30,38 @@ router = APIRouter(prefix="/patients", tags=["Patients"])
 
 allow_patient_manage = RoleChecker(["admin", "receptionist"])
 
-@router.get("", response_class=HTMLResponse, dependencies=[Depends(allow_patient_manage)])
+@router.get("", response_class=HTMLResponse, dependencies=[Depends(allow_patient_manage), Depends(ETagCheck("patients"))])
 async def list_complete_patients(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     page: int = 1,
     size:int = SIZE,
-    success: str = ''):
-    offset = (page - 1) * size
-    total_count = db.query(Patient).count()
-    patients = db.query(Patient).offset(offset).limit(size).all()
+    success: str = '',
+    after: str = None,
+    before: str = None):
+    # Paginação por cursor (?after=/?before=); ?page=N sozinho cai no offset
+    # Só as colunas exibidas, direto em PatientRow (app.rows)
+    query = patient_rows()
+    result_page = await keyset_paginate(
+        db, query, [Patient.id], size, after=after, before=before,
+        offset=0 if after or before else (page - 1) * size
+    )
+    total_count = await cached_count(db, "patients", query)
     total_pages = (total_count + size - 1) // size
     templote_name = ("patients/list_fragment.html" if request.headers.get("HX-request")
                      else "patients/list_full.html")
     
-    result = [
-        PatientResponse.model_validate(p)
-        for p in patients
-    ]
-    
     return templates.TemplateResponse(
         templote_name,
         {
             "request": request,
-            "patients": result,
+            "patients": as_rows(PatientRow, result_page.items),
             "current_page": page,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1,
+            "has_next": result_page.next_cursor is not None,
+            "has_prev": result_page.prev_cursor is not None,
+            "next_cursor": result_page.next_cursor,
+            "prev_cursor": result_page.prev_cursor,
             "success": success
         }
     )
@@ -57,12 +75,12 @@ def form_patient(request: Request):
     return templates.TemplateResponse(templote_name, {"request": request})
 
 
-@router.get("/edit/{patient_id}", response_class=HTMLResponse, dependencies=[Depends(allow_patient_manage)])
+@router.get("/edit/{patient_id}", response_class=HTMLResponse, dependencies=[Depends(allow_patient_manage), Depends(ETagCheck("patients"))])
 async def form_edit_patient(
-    request: Request, patient_id: int, db: Session = Depends(get_db)
+    request: Request, patient_id: int, db: AsyncSession = Depends(get_db)
 ):
     
-    db_patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    db_patient = await db.get(Patient, patient_id)
     if db_patient:
         templote_name = ("patients/form_fragment.html" if request.headers.get("HX-request")
                      else "patients/form_full.html")
@@ -104,7 +122,7 @@ async def salvar_paciente(
     birth_date: str = Form(...),
     contact: str = Form(...),
     address: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     patient_request = PatientCreate(
         name=name,
@@ -114,7 +132,7 @@ async def salvar_paciente(
         address=address
     )
     try:
-        exists = db.query(Patient).filter(Patient.cpf == cpf).first()
+        exists = await db.scalar(select(Patient).where(Patient.cpf == cpf))
 
         if exists:
             return templates.TemplateResponse(
@@ -130,7 +148,10 @@ async def salvar_paciente(
         )
 
         db.add(patient)
-        db.commit()
+        await bump_version(db, "patients")
+        await db.commit()
+        invalidate_count("patients")
+        invalidate_stats()
 
         response = await list_complete_patients(
             request,
@@ -141,7 +162,7 @@ async def salvar_paciente(
         response.headers['HX-Push-Url']='/patients'
         return response
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(e)
         return templates.TemplateResponse(
             "patients/form_fragment.html",
@@ -163,7 +184,7 @@ async def edit_patient(
     birth_date: str = Form(...),
     contact: str = Form(...),
     address: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     patient_update = PatientCreate(
         name=name,
@@ -173,10 +194,10 @@ async def edit_patient(
         address=address
     )
     
-    db_patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    db_patient = await db.get(Patient, patient_id)
     try:
         if db_patient:
-            exists = db.query(Patient).filter(Patient.cpf == cpf).first()
+            exists = await db.scalar(select(Patient).where(Patient.cpf == cpf))
 
             if (db_patient.cpf != patient_update.cpf and exists):
                 return templates.TemplateResponse(
@@ -194,7 +215,12 @@ async def edit_patient(
             db_patient.contact = patient_update.contact
             db_patient.address = patient_update.address
 
-            db.commit()
+            await db.flush()
+            await reindex_patient(db, patient_id)
+            await bump_version(db, "patients")
+            await db.commit()
+            # Nome/CPF fazem parte da busca do histórico
+            invalidate_count("history")
             response = await list_complete_patients(
                 request,
                 db,
@@ -227,12 +253,15 @@ async def edit_patient(
 
 @router.delete("/{patient_id}", dependencies=[Depends(allow_patient_manage)])
 async def delete_patient(
-    request: Request, patient_id: int, db: Session = Depends(get_db)
+    request: Request, patient_id: int, db: AsyncSession = Depends(get_db)
 ):
-    db_patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    db_patient = await db.get(Patient, patient_id)
     if db_patient:
-        db.delete(db_patient)
-        db.commit()
+        await db.delete(db_patient)
+        await bump_version(db, "patients")
+        await db.commit()
+        invalidate_count("patients")
+        invalidate_stats()
         return await list_complete_patients(
             request,
             db,
@@ -249,7 +278,53 @@ async def delete_patient(
     )
 
 
+@router.get("/import", response_class=HTMLResponse, dependencies=[Depends(allow_patient_manage)])
+def form_import(request: Request):
+    template_name = ("patients/import_fragment.html" if request.headers.get("HX-request")
+                     else "patients/import_full.html")
+    return templates.TemplateResponse(template_name, {"request": request})
+
+
+@router.post("/import", dependencies=[Depends(allow_patient_manage)])
+async def import_patients_file(file: UploadFile = File(...), format: str = Form(None)):
+    fmt = detect_format(file.filename, format)
+    # O FastAPI fecha o upload antes de a resposta em streaming começar:
+    # copia para um arquivo temporário próprio (em disco acima de 1 MB)
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    await run_in_threadpool(shutil.copyfileobj, file.file, spool)
+    spool.seek(0)
+
+    async def events():
+        try:
+            # Sessão própria: a do Depends(get_db) já foi fechada quando o streaming roda
+            async with AsyncSessionLocal() as db:
+                async for event in import_patients(db, read_rows(spool, fmt)):
+                    yield json.dumps(event, ensure_ascii=False) + "\n"
+        finally:
+            spool.close()
+            invalidate_count("patients")
+            invalidate_stats()
+
+    return StreamingResponse(events(), media_type=FORMATS["jsonl"])
+
+
+@router.get("/export", dependencies=[Depends(allow_patient_manage)])
+async def export_patients_file(format: str = "csv"):
+    fmt = export_format(format)
+
+    async def lines():
+        async with AsyncReadSessionLocal() as db:
+            async for chunk in export_patients(db, fmt):
+                yield chunk
+
+    filename = f"pacientes-{datetime.now():%Y%m%d}.{fmt}"
+    return StreamingResponse(
+        lines(),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/count")
-def amount_patients(db: Session = Depends(get_db)):
-    count = db.query(Patient).count()
-    return count
+async def amount_patients(db: AsyncSession = Depends(get_db)):
+    return await cached_count(db, "patients", select(Patient.id))
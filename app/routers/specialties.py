@@ -1,16 +1,27 @@
 from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.deps import get_db, templates
+from app.etag import ETagCheck
+from app.lookups import list_specialties
 from app.models import Specialty
+from app.versions import bump_version
 
 router = APIRouter(prefix="/specialties", tags=["Specialties"])
 
 
-@router.get("/manage", response_class=HTMLResponse)
-async def manage_specialties(request: Request, db: Session = Depends(get_db)):
-    specialties = db.query(Specialty).order_by(Specialty.name).all()
+async def _bump_specialties(db: AsyncSession):
+    # As listas de médicos e de funcionários também mostram a especialidade
+    await bump_version(db, "specialties")
+    await bump_version(db, "doctors")
+    await bump_version(db, "employees")
+
+
+@router.get("/manage", response_class=HTMLResponse, dependencies=[Depends(ETagCheck("specialties"))])
+async def manage_specialties(request: Request, db: AsyncSession = Depends(get_db)):
+    specialties = await list_specialties(db)
     # Rota híbrida: se for HTMX retorna fragmento, se for URL retorna página completa
     template = (
         "specialties/manage_fragment.html"
@@ -22,27 +33,45 @@ async def manage_specialties(request: Request, db: Session = Depends(get_db)):
     )
 
 
+def _flash_only(request: Request, message: str, level: str = "danger"):
+    # Nada a trocar no alvo: só o aviso fora da área (hx-swap-oob)
+    return templates.TemplateResponse(
+        "components/flash.html",
+        {"request": request, "flash": message, "flash_level": level},
+        headers={"HX-Reswap": "none"},
+    )
+
+
 @router.post("/", response_class=HTMLResponse)
 async def save_specialty(
-    request: Request, name: str = Form(...), db: Session = Depends(get_db)
+    request: Request, name: str = Form(...), db: AsyncSession = Depends(get_db)
 ):
-    new_spec = Specialty(name=name.upper())
+    new_spec = Specialty(name=name.strip().upper())
     db.add(new_spec)
-    db.commit()
+    try:
+        await _bump_specialties(db)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return _flash_only(request, f"A especialidade {new_spec.name} já existe.")
 
-    specialties = db.query(Specialty).order_by(Specialty.name).all()
+    # Só a nova linha (no topo da tabela) e o aviso; a lista não é refeita
     return templates.TemplateResponse(
-        "specialties/list_partial.html",
-        {"request": request, "specialties": specialties},
+        "specialties/partials/row.html",
+        {"request": request, "spec": new_spec, "flash": f"Especialidade {new_spec.name} cadastrada."},
     )
 
 
 @router.delete("/delete/{spec_id}")
-async def delete_specialty(request: Request, spec_id: int, db: Session = Depends(get_db)):
-    spec = db.query(Specialty).filter(Specialty.id == spec_id).first()
+async def delete_specialty(request: Request, spec_id: int, db: AsyncSession = Depends(get_db)):
+    spec = await db.get(Specialty, spec_id)
     if spec:
-        db.delete(spec)
-        db.commit()
-    specialties = db.query(Specialty).all()
-    return templates.TemplateResponse('specialties/list_partial.html', {"request": request, "specialties": specialties})
-
+        await db.delete(spec)
+        await _bump_specialties(db)
+        await db.commit()
+    # A linha sai da tabela (outerHTML vazio); fica só o aviso
+    return templates.TemplateResponse("components/flash.html", {
+        "request": request,
+        "flash": f"Especialidade {spec.name} excluída." if spec else "Especialidade já havia sido excluída.",
+        "flash_level": "success" if spec else "warning",
+    })
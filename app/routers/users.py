@@ -1,34 +1,48 @@
 from fastapi import APIRouter, Request, Depends, Form, HTTPException
 from fastapi.responses import HTMLResponse, Response
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from app.database import get_db
 from app.models import User, Employee
-from app.schemas import EmployeeResponse, UserCreate, UserResponse
-from app.deps import templates, get_current_user, RoleChecker
-from app.auth import get_password_hash
+from app.schemas import UserCreate
+from app.deps import templates, get_current_user, RoleChecker, invalidate_user_cache
+from app.auth import PASSWORD_HASH_RETRY_AFTER, PasswordHasherBusy, hash_password
+from app.etag import ETagCheck
+from app.rows import EmployeeOption, UserRow, as_rows, employee_options, user_rows
+from app.versions import bump_version
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 allow_patient_manage = RoleChecker(["admin"])
 
 
-@router.get("", response_class=HTMLResponse, dependencies=[Depends(allow_patient_manage)])
-async def list_users(request: Request, db: Session = Depends(get_db)):
+def _hasher_busy(request: Request):
+    # Fila do Argon2 cheia: nada muda na tela, só o aviso (static/js/flash.js)
+    return templates.TemplateResponse(
+        "components/flash.html",
+        {"request": request, "flash": "Servidor ocupado, tente novamente em instantes.", "flash_level": "warning"},
+        status_code=503,
+        headers={"HX-Reswap": "none", "Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+    )
+
+
+@router.get("", response_class=HTMLResponse, dependencies=[Depends(allow_patient_manage), Depends(ETagCheck("users", "employees"))])
+async def list_users(request: Request, db: AsyncSession = Depends(get_db)):
     template_name = (
         "users/list_fragment.html" if request.headers.get("HX-request")
         else "users/list_full.html"
     )
-    users = db.query(User).all()
-    result_users = [UserResponse.model_validate(u) for u in users ]
-    
-    available_employees = db.query(Employee).filter(~Employee.user_account.has()).all()
-    result_available_employees = [EmployeeResponse.model_validate(e) for e in available_employees]
+    # Usuário + nome do funcionário num SELECT com JOIN, só com as colunas exibidas
+    users = as_rows(UserRow, await db.execute(user_rows()))
+    available_employees = as_rows(
+        EmployeeOption, await db.execute(employee_options().where(~Employee.user_account.has()))
+    )
     return templates.TemplateResponse(template_name, {
         "request": request,
-        "users": result_users,
-        "employees": result_available_employees
+        "users": users,
+        "employees": available_employees
     })
 
 @router.post("/save", response_class=HTMLResponse)
@@ -37,7 +51,7 @@ async def save_user(
     employee_id: int = Form(...),
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user_request = UserCreate(
         username=username,
@@ -45,51 +59,76 @@ async def save_user(
         employee_id=employee_id
     )
     
+    try:
+        hashed_password = await hash_password(user_request.password)
+    except PasswordHasherBusy:
+        return _hasher_busy(request)
+
     new_user = User(
         username=user_request.username,
-        hashed_password=get_password_hash(user_request.password),
+        hashed_password=hashed_password,
         employee_id=user_request.employee_id,
         is_active=True
     )
     
     db.add(new_user)
-    db.commit()
-    # Retorna para a lista atualizada
-    return await list_users(request, db)
+    try:
+        await bump_version(db, "users")
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return templates.TemplateResponse(
+            "components/flash.html",
+            {"request": request, "flash": f"O usuário {username} já existe.", "flash_level": "danger"},
+            headers={"HX-Reswap": "none"},
+        )
+
+    # Só a linha nova; o funcionário sai do select e o aviso vai por hx-swap-oob
+    user = as_rows(UserRow, await db.execute(user_rows().where(User.id == new_user.id)))[0]
+    return templates.TemplateResponse("users/partials/row.html", {
+        "request": request,
+        "user": user,
+        "employee_id": user_request.employee_id,
+        "flash": f"Acesso de {user.employee_name} criado.",
+    })
 
 @router.post("/toggle-status/{user_id}", response_class=HTMLResponse)
-async def toggle_user_status(request: Request, user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def toggle_user_status(request: Request, user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if user:
         user.is_active = not user.is_active
-        db.commit()
-        
-        # Retornamos o fragmento do botão atualizado
-        status_text = "Ativo" if user.is_active else "Inativo"
-        bg_color = "bg-green-100 text-green-800" if user.is_active else "bg-red-100 text-red-800"
-        
-        return templates.TemplateResponse("users/partials/status_badge.html", {
+        await bump_version(db, "users")
+        await db.commit()
+        invalidate_user_cache(user_id=user.id)
+
+        # Só o selo de status e o aviso
+        return templates.TemplateResponse("users/partials/status_toggled.html", {
             "request": request,
             "user": user,
-            "bg_color": bg_color,
-            "status_text": status_text
+            "flash": f"Usuário {user.username} {'ativado' if user.is_active else 'desativado'}.",
         })
+    return Response(status_code=404)
 
      
 @router.get("/change-password-form/{user_id}")
-async def change_password_form(user_id: int, request: Request, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def change_password_form(user_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     return templates.TemplateResponse("users/partials/modal_password.html", {
         "request": request,
         "user": user
     })
 
 @router.post("/update-password/{user_id}")
-async def update_password(user_id: int, password: str = Form(...), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def update_password(request: Request, user_id: int, password: str = Form(...), db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if user:
-        user.hashed_password = get_password_hash(password)
-        db.commit()
+        try:
+            user.hashed_password = await hash_password(password)
+        except PasswordHasherBusy:
+            # O modal continua aberto para tentar de novo
+            return _hasher_busy(request)
+        await db.commit()
+        invalidate_user_cache(user_id=user.id)
     
     # Retornamos um cabeçalho para o HTMX fechar o modal ou apenas uma mensagem vazia
     return Response(headers={"HX-Trigger": "closeModal"})
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Linhas somente leitura para as telas de listagem.
+
+As listas só exibem dados. Elas não precisam de entidades ORM, com identity
+map e atributos instrumentados, nem da validação do Pydantic em cada linha.
+Cada função ``*_rows()`` devolve um SELECT apenas com as colunas exibidas,
+na ordem dos campos da dataclass correspondente. ``as_rows`` converte o
+resultado com uma chamada de construtor por linha.
+
+Os tipos são ``frozen`` e ``slots``: imutáveis e sem ``__dict__``, bem
+mais leves que um modelo do Pydantic ou uma entidade ORM.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Type, TypeVar
+
+from sqlalchemy import select
+
+from app.models import Employee, Patient, Specialty, User
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class PatientRow:
+    id: int
+    name: str
+    cpf: str
+    contact: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class EmployeeRow:
+    id: int
+    name: str
+    cpf: str
+    role: str
+    department: Optional[str]
+    specialty_name: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class EmployeeOption:
+    id: int
+    name: str
+    role: str
+
+
+@dataclass(frozen=True, slots=True)
+class UserRow:
+    id: int
+    username: str
+    is_active: bool
+    employee_name: Optional[str]
+
+
+def as_rows(row_type: Type[T], rows: Iterable) -> List[T]:
+    """Converte tuplas do SELECT (na ordem dos campos) em `row_type`."""
+    return [row_type(*row) for row in rows]
+
+
+def patient_rows():
+    return select(Patient.id, Patient.name, Patient.cpf, Patient.contact)
+
+
+def employee_rows():
+    return (
+        select(
+            Employee.id,
+            Employee.name,
+            Employee.cpf,
+            Employee.role,
+            Employee.department,
+            Specialty.name.label("specialty_name"),
+        )
+        .outerjoin(Specialty, Employee.specialty_id == Specialty.id)
+    )
+
+
+def employee_options():
+    return select(Employee.id, Employee.name, Employee.role)
+
+
+def user_rows():
+    return (
+        select(User.id, User.username, User.is_active, Employee.name.label("employee_name"))
+        .outerjoin(Employee, User.employee_id == Employee.id)
+    )
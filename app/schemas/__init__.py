@@ -1,4 +1,5 @@
 from .patient_schemas import PatientCreate, PatientResponse
 from .employee_schemas import EmployeeCreate, EmployeeResponse
 from .user_schemas import UserCreate, UserResponse
-from .specialty_schemas import SpecialtyCreate, SpecialtyResponse
\ No newline at end of file
+from .specialty_schemas import SpecialtyCreate, SpecialtyResponse
+from .appointment_schemas import AppointmentResponse
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+# Schema Base (campos comuns)
+class AppointmentBase(BaseModel):
+    patient_id: int
+    doctor_id: int
+    date: datetime
+    status: str = "scheduled"
+    cost: float = 0.0
+    notes: Optional[str] = None
+
+# Schema para Resposta (o que sai do banco para o template/API)
+class AppointmentResponse(AppointmentBase):
+    id: int
+
+    class Config:
+        from_attributes = True # Permite converter do modelo SQLAlchemy automaticamente
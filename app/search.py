@@ -0,0 +1,149 @@
+"""Índice de busca do histórico de atendimentos.
+
+SQLite usa uma tabela virtual FTS5 (rowid = id do prontuário); Postgres usa
+uma tabela comum com coluna tsvector (GIN) e índice trigram no nome do
+paciente. O índice é mantido pelas rotas que gravam prontuários/pacientes e
+pode ser reconstruído com:
+
+    python -m app.search rebuild
+"""
+import re
+import sys
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SEARCH_TABLE = "medical_records_search"
+
+# CPF e CID são indexados sem pontuação, para que "123.456" e "123456"
+# (ou "G44.2" e "G442") encontrem o mesmo registro
+_SOURCE_SELECT = """
+    SELECT mr.id AS record_id,
+           p.name AS patient_name,
+           replace(replace(p.cpf, '.', ''), '-', '') AS cpf,
+           mr.diagnosis AS diagnosis,
+           mr.chief_complaint AS chief_complaint,
+           replace(replace(mr.cid_code, '.', ''), '-', '') AS cid_code
+    FROM medical_records mr
+    JOIN appointments a ON a.id = mr.appointment_id
+    JOIN patients p ON p.id = a.patient_id
+"""
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        patient_name, cpf, diagnosis, chief_complaint, cid_code,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+        record_id INTEGER PRIMARY KEY REFERENCES medical_records(id) ON DELETE CASCADE,
+        patient_name TEXT,
+        cpf TEXT,
+        diagnosis TEXT,
+        chief_complaint TEXT,
+        cid_code TEXT,
+        document TSVECTOR GENERATED ALWAYS AS (
+            to_tsvector('simple',
+                coalesce(patient_name, '') || ' ' || coalesce(cpf, '') || ' ' ||
+                coalesce(diagnosis, '') || ' ' || coalesce(chief_complaint, '') || ' ' ||
+                coalesce(cid_code, ''))
+        ) STORED
+    )""",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_name_trgm ON {SEARCH_TABLE} USING GIN (patient_name gin_trgm_ops)",
+]
+
+
+def _is_sqlite(db) -> bool:
+    bind = db if hasattr(db, "dialect") else db.get_bind()
+    return bind.dialect.name == "sqlite"
+
+
+def search_terms(search: str) -> list:
+    """Quebra o texto digitado em termos normalizados para o índice."""
+    terms = []
+    for chunk in search.split():
+        if any(ch.isdigit() for ch in chunk):
+            # CPF/CID: remove a pontuação como no indexador
+            chunk = re.sub(r"[.\-/]", "", chunk)
+        terms.extend(re.findall(r"\w+", chunk))
+    return terms
+
+
+def _like_escape(value: str) -> str:
+    # % e _ digitados são literais, não curingas do LIKE
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_filter(db, search: str):
+    """Subquery com os ids de prontuário que casam com `search` (ou None)."""
+    terms = search_terms(search)
+    if not terms:
+        return None
+    if _is_sqlite(db):
+        # Cada termo vira um prefixo: "ana sil" -> "ana"* "sil"*
+        match = " ".join(f'"{term}"*' for term in terms)
+        return select(text("rowid")).select_from(text(SEARCH_TABLE)).where(
+            text(f"{SEARCH_TABLE} MATCH :match").bindparams(match=match)
+        )
+    query = " & ".join(f"{term}:*" for term in terms)
+    return select(text("record_id")).select_from(text(SEARCH_TABLE)).where(
+        text(
+            "document @@ to_tsquery('simple', :query) OR patient_name ILIKE :name ESCAPE '\\'"
+        ).bindparams(query=query, name=f"%{_like_escape(search)}%")
+    )
+
+
+def _delete_sql(db, where: str) -> str:
+    key = "rowid" if _is_sqlite(db) else "record_id"
+    return f"DELETE FROM {SEARCH_TABLE} WHERE {key} IN (SELECT mr.id FROM medical_records mr JOIN appointments a ON a.id = mr.appointment_id {where})"
+
+
+def _insert_sql(db, where: str) -> str:
+    key = "rowid" if _is_sqlite(db) else "record_id"
+    return (
+        f"INSERT INTO {SEARCH_TABLE} ({key}, patient_name, cpf, diagnosis, chief_complaint, cid_code) "
+        f"{_SOURCE_SELECT} {where}"
+    )
+
+
+async def index_medical_record(db: AsyncSession, record_id: int):
+    """(Re)indexa um prontuário. Deve rodar na mesma transação da gravação."""
+    where = "WHERE mr.id = :record_id"
+    await db.execute(text(_delete_sql(db, where)), {"record_id": record_id})
+    await db.execute(text(_insert_sql(db, where)), {"record_id": record_id})
+
+
+async def reindex_patient(db: AsyncSession, patient_id: int):
+    """Atualiza nome/CPF em todos os prontuários do paciente."""
+    where = "WHERE a.patient_id = :patient_id"
+    await db.execute(text(_delete_sql(db, where)), {"patient_id": patient_id})
+    await db.execute(text(_insert_sql(db, where)), {"patient_id": patient_id})
+
+
+def rebuild_search_index(conn):
+    """Cria (se preciso) e repopula o índice inteiro numa conexão síncrona."""
+    ddl = SQLITE_DDL if _is_sqlite(conn) else POSTGRES_DDL
+    for statement in ddl:
+        conn.execute(text(statement))
+    conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    conn.execute(text(_insert_sql(conn, "")))
+    if _is_sqlite(conn):
+        conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"))
+    return conn.execute(text(f"SELECT count(*) FROM {SEARCH_TABLE}")).scalar()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("uso: python -m app.search rebuild")
+        sys.exit(1)
+
+    from app.database import engine
+
+    with engine.begin() as conn:
+        total = rebuild_search_index(conn)
+    print(f"{total} prontuários indexados em {SEARCH_TABLE}")
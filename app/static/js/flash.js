@@ -0,0 +1,23 @@
+// Avisos enviados com hx-swap-oob para #flash-messages somem sozinhos
+(function () {
+    const DELAY = 5000;
+
+    // Respostas de erro com HX-Reswap: none (ex.: 503 com Retry-After) só
+    // trazem o aviso: deixa o htmx processar o hx-swap-oob delas
+    document.addEventListener("htmx:beforeSwap", function (event) {
+        const xhr = event.detail.xhr;
+        if (xhr.status >= 400 && xhr.getResponseHeader("HX-Reswap") === "none") {
+            event.detail.shouldSwap = true;
+            event.detail.isError = false;
+        }
+    });
+
+    document.addEventListener("htmx:afterSettle", function () {
+        document.querySelectorAll("#flash-messages [data-autodismiss]:not([data-dismiss-scheduled])").forEach(function (alert) {
+            alert.dataset.dismissScheduled = "1";
+            setTimeout(function () {
+                (bootstrap.Alert.getInstance(alert) || new bootstrap.Alert(alert)).close();
+            }, DELAY);
+        });
+    });
+})();
@@ -0,0 +1,33 @@
+(function () {
+    // Typeahead de paciente/médico: ao escolher uma opção, grava o id no
+    // campo oculto, mostra o nome no campo de busca e fecha a lista
+    document.querySelectorAll("[data-lookup-results]").forEach(function (results) {
+        results.addEventListener("click", function (event) {
+            const option = event.target.closest("[data-lookup-id]");
+            if (!option) return;
+            const field = option.dataset.lookupField;
+            document.getElementById("input-" + field + "-id").value = option.dataset.lookupId;
+            document.getElementById("input-" + field + "-search").value = option.dataset.lookupLabel;
+            results.innerHTML = "";
+        });
+    });
+    // Horário livre escolhido na busca: preenche médico e data do formulário
+    document.querySelectorAll("[data-free-slots]").forEach(function (results) {
+        results.addEventListener("click", function (event) {
+            const slot = event.target.closest("[data-slot-date]");
+            if (!slot) return;
+            document.getElementById("input-doctor-id").value = slot.dataset.slotDoctorId;
+            document.getElementById("input-doctor-search").value = slot.dataset.slotDoctorLabel;
+            document.getElementById("input-date").value = slot.dataset.slotDate;
+            results.querySelectorAll("[data-slot-date]").forEach(function (button) {
+                button.classList.toggle("active", button === slot);
+            });
+        });
+    });
+    document.querySelectorAll("[data-lookup-search]").forEach(function (input) {
+        input.addEventListener("input", function () {
+            // Texto alterado: a escolha anterior deixa de valer
+            document.getElementById("input-" + input.dataset.lookupSearch + "-id").value = "";
+        });
+    });
+})();
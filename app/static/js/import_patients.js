@@ -0,0 +1,68 @@
+(function () {
+    const form = document.getElementById("form-import-patients");
+    if (!form) return;
+
+    const panel = document.getElementById("import-progress");
+    const status = document.getElementById("import-status");
+    const rows = document.getElementById("import-rows");
+    const labels = { error: "Erro", duplicate: "Duplicado" };
+
+    function updateTotals(event) {
+        panel.querySelectorAll("[data-total]").forEach((el) => {
+            el.textContent = event[el.dataset.total];
+        });
+    }
+
+    function addRow(event) {
+        const tr = document.createElement("tr");
+        tr.className = event.type === "error" ? "table-danger" : "table-warning";
+        [event.row, labels[event.type], event.message + (event.cpf ? ` (${event.cpf})` : "")].forEach((value) => {
+            const td = document.createElement("td");
+            td.textContent = value;
+            tr.appendChild(td);
+        });
+        rows.appendChild(tr);
+    }
+
+    function handle(line) {
+        if (!line.trim()) return;
+        const event = JSON.parse(line);
+        if (event.type === "progress" || event.type === "done") {
+            updateTotals(event);
+        } else {
+            addRow(event);
+        }
+        if (event.type === "done") {
+            status.className = "alert alert-success py-2 small";
+            status.textContent = `Importação concluída: ${event.inserted} paciente(s) inserido(s).`;
+        }
+    }
+
+    form.addEventListener("submit", async (e) => {
+        e.preventDefault();
+        panel.classList.remove("d-none");
+        rows.innerHTML = "";
+        status.className = "alert alert-info py-2 small";
+        status.textContent = "Importando...";
+
+        const response = await fetch(form.action, { method: "POST", body: new FormData(form) });
+        if (!response.ok) {
+            status.className = "alert alert-danger py-2 small";
+            status.textContent = `Falha na importação (HTTP ${response.status}).`;
+            return;
+        }
+        // O servidor envia uma linha JSON por evento, à medida que processa
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split("\n");
+            buffer = lines.pop();
+            lines.forEach(handle);
+        }
+        handle(buffer);
+    });
+})();
@@ -0,0 +1,73 @@
+// Atualizações ao vivo da agenda e da fila do médico (Server-Sent Events).
+// A conexão só fica aberta enquanto a tela atual tem um [data-live]; cada
+// evento traz os parciais já renderizados e troca só o elemento afetado.
+(function () {
+    let source = null;
+
+    function fromHtml(html) {
+        const template = document.createElement("template");
+        template.innerHTML = html.trim();
+        return template.content.firstElementChild;
+    }
+
+    function swap(target, html) {
+        const element = fromHtml(html);
+        target.replaceWith(element);
+        htmx.process(element);
+        return element;
+    }
+
+    function updateRow(data) {
+        // Só agendamentos já listados; novos entram quando a lista recarrega
+        const row = document.getElementById(`appointment-row-${data.id}`);
+        if (row && document.querySelector('[data-live="appointments"]')) swap(row, data.row);
+    }
+
+    function updateQueue(data) {
+        const list = document.querySelector('[data-live="queue"]');
+        if (!list || list.dataset.doctorId !== String(data.doctor_id)) return;
+
+        const item = document.getElementById(`queue-item-${data.id}`);
+        if (item && data.queue) {
+            swap(item, data.queue);
+        } else if (item) {
+            item.remove();
+        } else if (data.queue) {
+            const element = fromHtml(data.queue);
+            const next = Array.from(list.querySelectorAll("[data-time]"))
+                .find((el) => el.dataset.time > data.time);
+            list.insertBefore(element, next || list.querySelector("[data-queue-empty]"));
+            htmx.process(element);
+        }
+
+        const total = list.querySelectorAll("[data-time]").length;
+        const count = document.getElementById("queue-count");
+        if (count) count.textContent = total;
+        list.querySelector("[data-queue-empty]")?.classList.toggle("d-none", total > 0);
+    }
+
+    function connect() {
+        source = new EventSource("/appointments/events");
+        source.addEventListener("appointment", (event) => {
+            const data = JSON.parse(event.data);
+            updateRow(data);
+            updateQueue(data);
+        });
+        // Eventos perdidos (cliente atrasado): recarrega a tela atual
+        source.addEventListener("reset", () => {
+            htmx.ajax("GET", location.pathname + location.search, "#main-content");
+        });
+    }
+
+    function sync() {
+        const live = document.querySelector("[data-live]");
+        if (live && !source) connect();
+        if (!live && source) {
+            source.close();
+            source = null;
+        }
+    }
+
+    document.addEventListener("DOMContentLoaded", sync);
+    document.addEventListener("htmx:afterSettle", sync);
+})();
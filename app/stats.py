@@ -0,0 +1,85 @@
+"""Números do dashboard.
+
+Calculados com poucas consultas agregadas (todas restritas ao dia/semana,
+usando o índice de ``appointments.date``) e guardados num cache curto, para
+que o polling do dashboard não gere varreduras. As rotas que gravam
+agendamentos, prontuários ou pacientes chamam ``invalidate_stats``.
+"""
+import os
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache
+from app.models import Appointment, Employee, Patient
+from app.pagination import cached_count
+from app.periods import day_range, week_range
+
+stats_cache = TTLCache(maxsize=8, ttl=float(os.getenv("DASHBOARD_STATS_TTL", "15")))
+
+# Agendamentos cancelados não entram no faturamento
+_BILLABLE = Appointment.status != "canceled"
+
+
+async def _today_by_status(db: AsyncSession, start: datetime, end: datetime) -> dict:
+    rows = await db.execute(
+        select(Appointment.status, func.count())
+        .where(Appointment.date >= start, Appointment.date < end)
+        .group_by(Appointment.status)
+    )
+    return {status: total for status, total in rows}
+
+
+async def _revenue_by_doctor(db: AsyncSession, start: datetime, end: datetime) -> list:
+    rows = await db.execute(
+        select(Employee.name, func.count(), func.coalesce(func.sum(Appointment.cost), 0))
+        .join(Employee, Appointment.doctor_id == Employee.id)
+        .where(Appointment.date >= start, Appointment.date < end, _BILLABLE)
+        .group_by(Employee.id, Employee.name)
+        .order_by(func.sum(Appointment.cost).desc())
+    )
+    return [
+        {"doctor": name, "appointments": total, "revenue": float(revenue)}
+        for name, total, revenue in rows
+    ]
+
+
+async def _revenue_by_day(db: AsyncSession, start: datetime, end: datetime) -> list:
+    day = func.date(Appointment.date)
+    rows = await db.execute(
+        select(day, func.coalesce(func.sum(Appointment.cost), 0))
+        .where(Appointment.date >= start, Appointment.date < end, _BILLABLE)
+        .group_by(day)
+        .order_by(day)
+    )
+    return [{"day": str(d), "revenue": float(revenue)} for d, revenue in rows]
+
+
+async def dashboard_stats(db: AsyncSession, day: Optional[date] = None) -> dict:
+    day = day or date.today()
+    stats = stats_cache.get(day)
+    if stats is not None:
+        return stats
+
+    today_start, today_end = day_range(day)
+    week_start, week_end = week_range(day)
+    by_status = await _today_by_status(db, today_start, today_end)
+    by_doctor = await _revenue_by_doctor(db, today_start, today_end)
+    stats = {
+        "day": day.isoformat(),
+        "patients_total": await cached_count(db, "patients", select(Patient.id)),
+        "appointments_today": sum(by_status.values()),
+        "appointments_by_status": by_status,
+        "completed_today": by_status.get("completed", 0),
+        "revenue_today": sum(item["revenue"] for item in by_doctor),
+        "revenue_by_doctor": by_doctor,
+        "revenue_by_day": await _revenue_by_day(db, week_start, week_end),
+    }
+    stats_cache.set(day, stats)
+    return stats
+
+
+def invalidate_stats() -> None:
+    stats_cache.clear()
@@ -0,0 +1,100 @@
+"""Ambiente Jinja2 da aplicação.
+
+- Bytecode cache em disco (``JINJA_CACHE_DIR``): um worker novo carrega os
+  templates já compilados em vez de recompilar o fonte.
+- ``precompile_templates`` compila todos os templates na subida, para que a
+  primeira requisição de cada página não pague a compilação.
+- ``cached_include``: inclui um template renderizando-o uma vez por chave
+  (ex.: a sidebar por usuário, o head e o footer uma vez só) e reaproveita o
+  HTML nas próximas páginas completas.
+"""
+import logging
+import os
+import tempfile
+import time
+from typing import Hashable
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+
+from app.assets import static_url
+from app.cache import TTLCache
+from app.metrics import add_template_time
+
+logger = logging.getLogger("app.templating")
+
+TEMPLATE_DIR = "app/templates"
+JINJA_CACHE_DIR = os.getenv(
+    "JINJA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "clinicmanager-jinja")
+)
+# Em produção pode ser 0: o Jinja deixa de checar a data dos arquivos a cada render
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "1") == "1"
+
+fragment_cache = TTLCache(maxsize=512, ttl=float(os.getenv("FRAGMENT_CACHE_TTL", "300")))
+
+
+def _fragment_key(value) -> Hashable:
+    if isinstance(value, jinja2.Undefined):
+        return None
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+@jinja2.pass_context
+def cached_include(context, template_name: str, key=None) -> Markup:
+    """Como ``{% include %}``, mas com o HTML em cache por (template, key).
+
+    Só serve para trechos cujo resultado depende apenas de `key`.
+    """
+    cache_key = (template_name, _fragment_key(key))
+    html = fragment_cache.get(cache_key)
+    if html is None:
+        template = context.environment.get_template(template_name)
+        html = Markup(template.render(context.get_all()))
+        fragment_cache.set(cache_key, html)
+    return html
+
+
+def build_environment() -> jinja2.Environment:
+    os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+        autoescape=jinja2.select_autoescape(),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(JINJA_CACHE_DIR),
+        auto_reload=TEMPLATES_AUTO_RELOAD,
+    )
+    env.globals["cached_include"] = cached_include
+    env.globals["static_url"] = static_url
+    return env
+
+
+def precompile_templates(env: jinja2.Environment) -> int:
+    """Compila (e grava no bytecode cache) todos os templates."""
+    start = time.perf_counter()
+    total = 0
+    for name in env.list_templates(extensions=["html"]):
+        try:
+            env.get_template(name)
+            total += 1
+        except jinja2.TemplateSyntaxError as exc:
+            logger.error("template %s não compila: %s", name, exc)
+    logger.info("%d templates pré-compilados em %.0fms", total, (time.perf_counter() - start) * 1000)
+    return total
+
+
+class TimedTemplates(Jinja2Templates):
+    """Jinja2Templates que soma o tempo de renderização nas métricas da requisição."""
+
+    def TemplateResponse(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().TemplateResponse(*args, **kwargs)
+        finally:
+            add_template_time(time.perf_counter() - start)
+
+
+templates = TimedTemplates(env=build_environment())
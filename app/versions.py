@@ -0,0 +1,78 @@
+"""Versões por recurso para invalidar caches em todos os workers.
+
+Quem grava chama ``bump_version`` antes do commit; quem lê usa um
+``VersionedCache``, que só recarrega o valor quando a versão no banco
+(tabela ``cache_versions``) difere da guardada. Com vários workers do
+uvicorn, cada um percebe a mudança na próxima leitura após o intervalo
+de checagem, sem precisar de TTL longo nem de um broker.
+"""
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CacheVersion
+
+# Segundos entre consultas à versão no banco (0 = checa em toda leitura)
+VERSION_CHECK_INTERVAL = float(os.getenv("VERSION_CHECK_INTERVAL", "1"))
+
+_caches: Dict[str, "VersionedCache"] = {}
+
+
+async def get_version(db: AsyncSession, name: str) -> int:
+    version = await db.scalar(select(CacheVersion.version).where(CacheVersion.name == name))
+    return version or 0
+
+
+async def get_versions(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """Versões de vários recursos numa consulta só (0 para os que não existem)."""
+    names = list(names)
+    rows = await db.execute(select(CacheVersion.name, CacheVersion.version).where(CacheVersion.name.in_(names)))
+    versions = dict.fromkeys(names, 0)
+    versions.update(rows.tuples().all())
+    return versions
+
+
+async def bump_version(db: AsyncSession, name: str) -> None:
+    """Incrementa a versão de `name` na transação corrente de `db`."""
+    result = await db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(name=name, version=1))
+        await db.flush()
+    # Neste worker a mudança vale na hora, sem esperar o intervalo
+    cache = _caches.get(name)
+    if cache is not None:
+        cache.clear()
+
+
+class VersionedCache:
+    """Valor único em memória, válido enquanto a versão de `name` não muda."""
+
+    def __init__(self, name: str, check_interval: Optional[float] = None):
+        self.name = name
+        self.check_interval = VERSION_CHECK_INTERVAL if check_interval is None else check_interval
+        self._version: Optional[int] = None
+        self._value: Any = None
+        self._checked_at = 0.0
+        _caches[name] = self
+
+    async def get(self, db: AsyncSession, loader: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return self._value
+        version = await get_version(db, self.name)
+        if version != self._version:
+            self._value = await loader(db)
+            self._version = version
+        self._checked_at = now
+        return self._value
+
+    def clear(self) -> None:
+        self._version = None
+        self._value = None
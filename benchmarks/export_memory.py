@@ -0,0 +1,92 @@
+"""Confere que a exportação de prontuários usa memória constante.
+
+Mede o pico de memória (tracemalloc) de ``stream_export`` consumindo toda a
+exportação e compara com carregar as mesmas linhas de uma vez. O pico do
+streaming deve ficar no tamanho de um lote, qualquer que seja o total.
+
+Contra o banco de DB_URL (populado com `python -m benchmarks.seed`):
+
+    python -m benchmarks.export_memory
+
+Ou com um banco sintético temporário do tamanho pedido:
+
+    python -m benchmarks.export_memory --synthetic 200000 --max-mb 20
+
+Sai com código 1 se o pico do streaming passar de --max-mb.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=0, help="cria um banco temporário com N atendimentos")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--max-mb", type=float, default=20.0)
+    parser.add_argument("--skip-buffered", action="store_true", help="não mede a versão que carrega tudo")
+    return parser.parse_args()
+
+
+async def _measure(consume) -> tuple:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    result = await consume()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / 1024 / 1024, elapsed
+
+
+async def run(fmt: str, max_mb: float, skip_buffered: bool) -> bool:
+    from app.database import AsyncReadSessionLocal
+    from app.export import stream_export
+    from app.routers.medical_records import EXPORT_FIELDS, export_query
+
+    async def streamed():
+        rows = size = 0
+        async with AsyncReadSessionLocal() as db:
+            async for chunk in stream_export(db, export_query(), EXPORT_FIELDS, fmt):
+                size += len(chunk)
+                rows += chunk.count("\n")
+        return rows, size
+
+    (rows, size), peak, elapsed = await _measure(streamed)
+    print(f"streaming:       {rows} linhas, {size / 1024 / 1024:.1f} MB gerados, pico {peak:.1f} MB, {elapsed:.1f}s")
+
+    if not skip_buffered:
+        async def buffered():
+            # O que a exportação faria sem streaming: todas as linhas na memória
+            async with AsyncReadSessionLocal() as db:
+                rows = (await db.execute(export_query())).all()
+                return len(rows)
+
+        _, peak_all, elapsed_all = await _measure(buffered)
+        print(f"tudo na memória: pico {peak_all:.1f} MB, {elapsed_all:.1f}s")
+
+    ok = peak <= max_mb
+    print("OK" if ok else f"FALHOU: pico do streaming acima de {max_mb} MB")
+    return ok
+
+
+def main():
+    args = _parse_args()
+    if args.synthetic:
+        path = os.path.join(tempfile.mkdtemp(prefix="export-memory-"), "clinic.db")
+        os.environ["DB_URL"] = f"sqlite:///{path}"
+        os.environ.pop("DB_READ_URL", None)
+        from benchmarks.seed import seed
+
+        print(f"populando {path} com {args.synthetic} atendimentos...")
+        seed(patients=max(1, args.synthetic // 10), doctors=20, appointments=args.synthetic)
+    ok = asyncio.run(run(args.format, args.max_mb, args.skip_buffered))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compara entidades ORM + Pydantic com linhas projetadas (app.rows).
+
+Monta uma página de pacientes com --rows linhas de três formas:
+
+* ``orm``: ``select(Patient)`` + ``PatientResponse.model_validate`` por linha
+  (como a lista fazia antes);
+* ``adapter``: as mesmas entidades validadas de uma vez com um
+  ``TypeAdapter(List[PatientResponse])``;
+* ``rows``: ``patient_rows()`` (só as colunas exibidas) convertido em
+  ``PatientRow``.
+
+Mede consulta + conversão e a renderização de patients/list_fragment.html.
+Rode contra um banco populado com `python -m benchmarks.seed`:
+
+    python -m benchmarks.list_rows --rows 1000 --repeat 30
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from typing import List
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    return parser.parse_args()
+
+
+def _request():
+    from starlette.requests import Request
+
+    from app.main import app
+
+    request = Request({
+        "type": "http", "method": "GET", "path": "/patients", "root_path": "", "scheme": "http",
+        "query_string": b"", "headers": [], "server": ("bench", 80), "app": app, "router": app.router,
+    })
+    request.state.user = SimpleNamespace(id=0, employee_id=0, role="admin", username="bench")
+    return request
+
+
+async def run(size: int, repeat: int):
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from app.database import AsyncReadSessionLocal
+    from app.models import Patient
+    from app.rows import PatientRow, as_rows, patient_rows
+    from app.schemas import PatientResponse
+    from app.templating import templates
+
+    adapter = TypeAdapter(List[PatientResponse])
+    template = templates.env.get_template("patients/list_fragment.html")
+    request = _request()
+
+    async def orm(db):
+        entities = (await db.scalars(select(Patient).order_by(Patient.id).limit(size))).all()
+        return [PatientResponse.model_validate(p) for p in entities]
+
+    async def typed(db):
+        entities = (await db.scalars(select(Patient).order_by(Patient.id).limit(size))).all()
+        return adapter.validate_python(entities, from_attributes=True)
+
+    async def projected(db):
+        return as_rows(PatientRow, await db.execute(patient_rows().order_by(Patient.id).limit(size)))
+
+    print(f"{'variante':<10} {'linhas':>7} {'dados ms':>9} {'render ms':>10} {'total ms':>9}")
+    for name, load in (("orm", orm), ("adapter", typed), ("rows", projected)):
+        fetch, render = [], []
+        for _ in range(repeat):
+            # Sessão nova a cada rodada: sem identity map aproveitado entre elas
+            async with AsyncReadSessionLocal() as db:
+                started = time.perf_counter()
+                patients = await load(db)
+                loaded = time.perf_counter()
+                template.render(request=request, patients=patients, current_page=1, total_pages=1)
+                fetch.append((loaded - started) * 1000)
+                render.append((time.perf_counter() - loaded) * 1000)
+        data_ms, render_ms = statistics.median(fetch), statistics.median(render)
+        print(f"{name:<10} {len(patients):>7} {data_ms:>9.2f} {render_ms:>10.2f} {data_ms + render_ms:>9.2f}")
+
+
+def main():
+    args = _parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Mede a vazão (req/s) do servidor sob requisições concorrentes.
+
+Rode o servidor (uvicorn app.main:app --workers 1) contra um banco populado
+com `python -m benchmarks.seed` e execute:
+
+    python -m benchmarks.load_concurrency --url http://localhost:8000 \
+        --concurrency 50 --requests 1000 /consultations/history?search=Paciente
+
+Para comparar antes/depois, rode o mesmo comando contra cada versão do
+servidor usando o mesmo banco.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.auth import create_access_token
+from benchmarks.seed import BENCH_USER
+
+DEFAULT_PATHS = ["/patients", "/employees", "/consultations/history?search=Paciente", "/appointments"]
+
+
+async def run(url: str, paths: list, concurrency: int, total: int, hx: bool):
+    cookies = {"access_token": f"Bearer {create_access_token({'sub': BENCH_USER})}"}
+    headers = {"HX-Request": "true"} if hx else {}
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async with httpx.AsyncClient(base_url=url, cookies=cookies, headers=headers, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requisições: {total}  concorrência: {concurrency}  erros: {errors}")
+    print(f"vazão: {total / elapsed:.1f} req/s  tempo total: {elapsed:.2f}s")
+    print(
+        f"latência p50: {statistics.median(latencies) * 1000:.1f}ms  "
+        f"p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms  "
+        f"max: {latencies[-1] * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--no-hx", action="store_true", help="Pede a página completa em vez do fragmento HTMX")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.paths, args.concurrency, args.requests, not args.no_hx))
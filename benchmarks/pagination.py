@@ -0,0 +1,76 @@
+"""Compara a latência da página N com OFFSET e com cursor (keyset).
+
+Rode contra um banco populado com `python -m benchmarks.seed`:
+
+    python -m benchmarks.pagination --size 10 --pages 1 100 1000 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.database import AsyncSessionLocal
+from app.models import Appointment, MedicalRecord, Patient
+from app.pagination import encode_cursor, keyset_paginate
+
+
+def _lists():
+    return {
+        "patients": (select(Patient), [Patient.id], False),
+        "history": (
+            select(MedicalRecord).join(Appointment).join(Patient).options(
+                selectinload(MedicalRecord.appointment).selectinload(Appointment.patient),
+            ),
+            [MedicalRecord.created_at, MedicalRecord.id],
+            True,
+        ),
+    }
+
+
+async def _timed(coro_factory, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+async def run(size: int, pages: list, repeat: int):
+    async with AsyncSessionLocal() as db:
+        for name, (query, keys, descending) in _lists().items():
+            print(f"\n{name} (size={size})")
+            print(f"{'página':>8} {'offset (ms)':>12} {'cursor (ms)':>12}")
+            order = [k.desc() if descending else k.asc() for k in keys]
+            for page in pages:
+                offset = (page - 1) * size
+                # Cursor da página N = chave da última linha da página N-1
+                cursor = None
+                if offset:
+                    last = (await db.execute(
+                        query.with_only_columns(*keys).order_by(*order).offset(offset - 1).limit(1)
+                    )).first()
+                    if last is None:
+                        continue
+                    cursor = encode_cursor(list(last))
+
+                offset_ms = await _timed(
+                    lambda: keyset_paginate(db, query, keys, size, descending=descending, offset=offset), repeat
+                )
+                cursor_ms = await _timed(
+                    lambda: keyset_paginate(db, query, keys, size, after=cursor, descending=descending), repeat
+                )
+                db.expunge_all()
+                print(f"{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 1000, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.pages, args.repeat))
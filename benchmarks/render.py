@@ -0,0 +1,77 @@
+"""Mede o tempo de renderização de template das páginas de listagem.
+
+Usa o cabeçalho ``Server-Timing`` (tpl = template, total = requisição) e faz
+as requisições em processo, sem servidor. Rode contra um banco populado com
+`python -m benchmarks.seed`:
+
+    python -m benchmarks.render --repeat 50
+
+``--cold`` mede também a compilação: limpa o bytecode cache do Jinja e o
+cache de fragmentos e mostra o tempo da primeira renderização de cada página.
+"""
+import argparse
+import re
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+
+from app.auth import create_access_token
+from app.main import app
+from app.templating import fragment_cache, templates
+from benchmarks.seed import BENCH_USER
+
+DEFAULT_PATHS = [
+    "/patients",
+    "/employees",
+    "/users",
+    "/appointments",
+    "/consultations/history",
+]
+
+_TIMING = re.compile(r"(\w+);(?:desc=\"[^\"]*\";)?dur=([\d.]+)")
+
+
+def _timings(response) -> dict:
+    return {name: float(dur) for name, dur in _TIMING.findall(response.headers.get("server-timing", ""))}
+
+
+def _p95(samples: list) -> float:
+    return sorted(samples)[max(0, int(len(samples) * 0.95) - 1)]
+
+
+def run(paths: list, repeat: int, cold: bool):
+    if cold:
+        templates.env.bytecode_cache.clear()
+        templates.env.cache.clear()
+        fragment_cache.clear()
+
+    client = TestClient(app)
+    client.cookies.set("access_token", f"Bearer {create_access_token({'sub': BENCH_USER})}")
+
+    print(f"{'página':<28} {'tipo':<5} {'1ª tpl':>8} {'tpl ms':>8} {'p95':>8} {'total ms':>9} {'p95':>8}")
+    for path in paths:
+        for hx in (True, False):
+            headers = {"HX-Request": "true"} if hx else {}
+            first = _timings(client.get(path, headers=headers)).get("tpl", 0.0)
+            tpl, total = [], []
+            for _ in range(repeat):
+                timings = _timings(client.get(path, headers=headers))
+                tpl.append(timings.get("tpl", 0.0))
+                total.append(timings.get("total", 0.0))
+            print(
+                f"{path:<28} {'hx' if hx else 'full':<5} {first:>8.2f} "
+                f"{statistics.mean(tpl):>8.2f} {_p95(tpl):>8.2f} "
+                f"{statistics.mean(total):>9.2f} {_p95(total):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--cold", action="store_true")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    run(args.paths, args.repeat, args.cold)
+    print(f"\n{time.perf_counter() - started:.1f}s")
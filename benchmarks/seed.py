@@ -0,0 +1,116 @@
+"""Popula o banco apontado por DB_URL com dados sintéticos para os benchmarks.
+
+Uso:
+    python -m benchmarks.seed --patients 5000 --appointments 20000
+"""
+import argparse
+import datetime
+import random
+
+from app.auth import get_password_hash
+from app.database import Base, SessionLocal, engine
+from app.models import Appointment, Employee, MedicalRecord, Patient, Specialty, User
+from app.search import rebuild_search_index
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench"
+
+
+def cpf_for(n: int) -> str:
+    digits = f"{n:011d}"
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+
+
+def seed(patients: int, doctors: int, appointments: int, chunk: int = 5000):
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        specialty = Specialty(name="CLINICA GERAL")
+        db.add(specialty)
+        db.flush()
+
+        admin = Employee(
+            name="Administrador Benchmark",
+            cpf=cpf_for(0),
+            birth_date=datetime.date(1980, 1, 1),
+            role="admin",
+        )
+        db.add(admin)
+        doctor_rows = [
+            Employee(
+                name=f"Medico {i:04d}",
+                cpf=cpf_for(10_000_000 + i),
+                birth_date=datetime.date(1975, 1, 1),
+                role="doctor",
+                crm=f"{i:07d}",
+                specialty_id=specialty.id,
+            )
+            for i in range(doctors)
+        ]
+        db.add_all(doctor_rows)
+        db.flush()
+        db.add(User(username=BENCH_USER, hashed_password=get_password_hash(BENCH_PASSWORD), employee_id=admin.id))
+        db.commit()
+        doctor_ids = [d.id for d in doctor_rows]
+
+        for start in range(0, patients, chunk):
+            db.bulk_insert_mappings(Patient, [
+                {
+                    "name": f"Paciente {n:07d}",
+                    "cpf": cpf_for(20_000_000 + n),
+                    "birth_date": datetime.date(1990, 1, 1),
+                    "contact": "(00) 0 0000-0000",
+                    "address": "Rua Benchmark",
+                }
+                for n in range(start, min(start + chunk, patients))
+            ])
+            db.commit()
+        patient_ids = [pid for (pid,) in db.query(Patient.id).all()]
+
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time(8, 0))
+        for start in range(0, appointments, chunk):
+            rows = []
+            for n in range(start, min(start + chunk, appointments)):
+                # Médicos em rodízio e 16 horários de 30 min por dia, voltando
+                # no tempo: nunca dois agendamentos do médico no mesmo horário
+                slot = n // len(doctor_ids)
+                days_ago = slot // 16
+                rows.append({
+                    "patient_id": random.choice(patient_ids),
+                    "doctor_id": doctor_ids[n % len(doctor_ids)],
+                    "date": today - datetime.timedelta(days=days_ago) + datetime.timedelta(minutes=30 * (slot % 16)),
+                    "status": "completed" if days_ago else "scheduled",
+                    "cost": 150.0,
+                })
+            db.bulk_insert_mappings(Appointment, rows)
+            db.commit()
+
+        completed = db.query(Appointment.id).filter(Appointment.status == "completed").all()
+        for start in range(0, len(completed), chunk):
+            db.bulk_insert_mappings(MedicalRecord, [
+                {
+                    "appointment_id": app_id,
+                    "chief_complaint": "Dor de cabeça",
+                    "diagnosis": "Cefaleia tensional",
+                    "prescription": {"text": "Dipirona 500mg"},
+                    "physical_exam": "Sem alterações",
+                    "cid_code": "G44.2",
+                    "created_at": datetime.datetime.utcnow().isoformat(),
+                }
+                for (app_id,) in completed[start:start + chunk]
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+    with engine.begin() as conn:
+        rebuild_search_index(conn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--appointments", type=int, default=20000)
+    args = parser.parse_args()
+    seed(args.patients, args.doctors, args.appointments)
@@ -0,0 +1,113 @@
+"""Mede a busca de horários livres por especialidade (app.availability).
+
+Com um banco sintético: um ano de atendimentos passados (benchmarks.seed) e
+um ano de agenda futura ocupada na fração --occupancy dos horários:
+
+    python -m benchmarks.slots --synthetic --doctors 20 --occupancy 0.9
+
+Ou contra o banco de DB_URL, na primeira especialidade cadastrada:
+
+    python -m benchmarks.slots
+
+Sai com código 1 se a mediana passar de --max-ms.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", action="store_true", help="cria um banco temporário")
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--occupancy", type=float, default=0.9, help="fração dos horários futuros já ocupada")
+    parser.add_argument("--days", type=int, default=14, help="janela da busca")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--max-ms", type=float, default=50.0)
+    return parser.parse_args()
+
+
+def _book_future(occupancy: float):
+    from app.availability import DEFAULT_WEEK
+    from app.database import SessionLocal
+    from app.models import Appointment, Employee, Patient
+
+    db = SessionLocal()
+    try:
+        doctor_ids = [id for (id,) in db.query(Employee.id).filter(Employee.role == "doctor")]
+        patient_ids = [id for (id,) in db.query(Patient.id)]
+        today = datetime.date.today() + datetime.timedelta(days=1)
+        rows = []
+        for offset in range(365):
+            day = today + datetime.timedelta(days=offset)
+            period = DEFAULT_WEEK.get(day.weekday())
+            if period is None:
+                continue
+            for doctor_id in doctor_ids:
+                for start in period.slots(day):
+                    if random.random() < occupancy:
+                        rows.append({
+                            "patient_id": random.choice(patient_ids),
+                            "doctor_id": doctor_id,
+                            "date": start,
+                            "status": "scheduled",
+                            "cost": 150.0,
+                        })
+        db.bulk_insert_mappings(Appointment, rows)
+        db.commit()
+        return len(rows)
+    finally:
+        db.close()
+
+
+async def run(days: int, repeat: int, max_ms: float) -> bool:
+    from sqlalchemy import func, select
+
+    from app.availability import find_free_slots
+    from app.database import AsyncSessionLocal
+    from app.models import Appointment, Specialty
+
+    async with AsyncSessionLocal() as db:
+        specialty_id = await db.scalar(select(Specialty.id).order_by(Specialty.id).limit(1))
+        total = await db.scalar(select(func.count(Appointment.id)))
+        if specialty_id is None:
+            print("nenhuma especialidade cadastrada")
+            return False
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            slots = await find_free_slots(db, specialty_id, days=days)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    print(f"{total} agendamentos; {len(slots)} horários livres, primeiro {slots[0].start if slots else '-'}")
+    median = statistics.median(samples)
+    print(f"busca ({days} dias): mediana {median:.2f} ms, máx {max(samples):.2f} ms")
+    ok = median <= max_ms
+    print("OK" if ok else f"FALHOU: mediana acima de {max_ms} ms")
+    return ok
+
+
+def main():
+    args = _parse_args()
+    if args.synthetic:
+        path = os.path.join(tempfile.mkdtemp(prefix="slots-"), "clinic.db")
+        os.environ["DB_URL"] = f"sqlite:///{path}"
+        os.environ.pop("DB_READ_URL", None)
+        from benchmarks.seed import seed
+
+        print(f"populando {path}...")
+        # Um ano de histórico: 16 horários por dia para cada médico
+        seed(patients=5000, doctors=args.doctors, appointments=args.doctors * 16 * 365)
+        print(f"{_book_future(args.occupancy)} agendamentos futuros")
+    ok = asyncio.run(run(args.days, args.repeat, args.max_ms))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
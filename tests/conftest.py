@@ -0,0 +1,45 @@
+"""Banco SQLite temporário, populado uma vez por sessão com benchmarks.seed.
+
+As variáveis de ambiente precisam estar definidas antes de qualquer import
+de ``app`` (app.database cria os engines no import).
+"""
+import os
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="clinic-tests-")
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'clinic.db')}"
+os.environ.pop("DB_READ_URL", None)
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+SEED_PATIENTS = 2000
+SEED_DOCTORS = 10
+SEED_APPOINTMENTS = 20000
+
+
+@pytest.fixture(scope="session")
+def seeded_db():
+    from benchmarks.seed import seed
+
+    seed(patients=SEED_PATIENTS, doctors=SEED_DOCTORS, appointments=SEED_APPOINTMENTS)
+    return os.environ["DB_URL"]
+
+
+@pytest.fixture(scope="session")
+def client(seeded_db):
+    """TestClient autenticado como o administrador do seed."""
+    from fastapi.testclient import TestClient
+
+    from app.auth import create_access_token
+    from app.main import app
+    from benchmarks.seed import BENCH_USER
+
+    with TestClient(app) as client:
+        client.cookies.set("access_token", f"Bearer {create_access_token({'sub': BENCH_USER})}")
+        # Carrega o usuário no cache de autenticação: a consulta dele não
+        # entra na conta das rotas (test_query_counts)
+        assert client.get("/").status_code == 200
+        yield client
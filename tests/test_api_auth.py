@@ -0,0 +1,25 @@
+"""Emissão de token da API (/api/v1/token)."""
+import asyncio
+
+from app import auth
+from app.routers import api
+
+
+def test_unknown_user_pays_the_password_check(client, monkeypatch):
+    # Sem a verificação o 401 de usuário inexistente volta sem Argon2, bem
+    # mais rápido que o de senha errada: o tempo revelaria os usuários
+    checked = []
+
+    async def spy(password):
+        checked.append(password)
+
+    monkeypatch.setattr(api, "verify_missing_user", spy)
+    response = client.post("/api/v1/token", data={"username": "nao-existe", "password": "segredo"})
+
+    assert response.status_code == 401
+    assert checked == ["segredo"]
+
+
+def test_verify_missing_user_runs_argon2():
+    asyncio.run(auth.verify_missing_user("segredo"))
+    assert auth._dummy_hash.startswith("$argon2")
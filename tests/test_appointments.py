@@ -0,0 +1,71 @@
+"""Fluxo dos agendamentos: mudança de status e registro do atendimento."""
+import datetime
+
+from sqlalchemy import select
+
+from app.availability import DEFAULT_WEEK
+from app.database import SessionLocal
+from app.models import Appointment, Employee, Patient
+
+HX = {"HX-Request": "true"}
+
+
+def _next_monday_slot() -> datetime.datetime:
+    # Horário dentro da agenda padrão, no futuro (o seed só marca até hoje)
+    day = datetime.date.today() + datetime.timedelta(days=7)
+    day -= datetime.timedelta(days=day.weekday())
+    return datetime.datetime.combine(day, DEFAULT_WEEK[0].start)
+
+
+def _book(**values) -> int:
+    with SessionLocal() as db:
+        doctor_id = db.scalar(select(Employee.id).where(Employee.role == "doctor").limit(1))
+        patient_id = db.scalar(select(Patient.id).limit(1))
+        appointment = Appointment(patient_id=patient_id, doctor_id=doctor_id, cost=150.0, **values)
+        db.add(appointment)
+        db.commit()
+        return appointment.id
+
+
+def _status(appointment_id: int) -> str:
+    with SessionLocal() as db:
+        return db.get(Appointment, appointment_id).status
+
+
+def test_reactivating_onto_rebooked_slot_keeps_it_canceled(client):
+    slot = _next_monday_slot()
+    canceled = _book(date=slot, status="canceled")
+    # O horário foi remarcado para outro paciente depois do cancelamento
+    _book(date=slot, status="scheduled")
+
+    response = client.post(f"/appointments/update-status/{canceled}", data={"status": "scheduled"}, headers=HX)
+
+    assert response.status_code == 200
+    assert "alert-danger" in response.text
+    assert "já tem uma consulta marcada" in response.text
+    assert _status(canceled) == "canceled"
+
+
+def test_reactivating_free_slot(client):
+    slot = _next_monday_slot() + datetime.timedelta(hours=2)
+    canceled = _book(date=slot, status="canceled")
+
+    response = client.post(f"/appointments/update-status/{canceled}", data={"status": "scheduled"}, headers=HX)
+
+    assert response.status_code == 200
+    assert "alert-success" in response.text
+    assert _status(canceled) == "scheduled"
+
+
+def test_saving_record_for_missing_appointment_shows_flash(client):
+    response = client.post(
+        "/consultations/save/999999",
+        data={"chief_complaint": "a", "physical_exam": "b", "diagnosis": "c", "prescription": "d"},
+        headers=HX,
+    )
+
+    # static/js/flash.js deixa o htmx processar o hx-swap-oob de erros com
+    # HX-Reswap: none
+    assert response.status_code == 404
+    assert response.headers["HX-Reswap"] == "none"
+    assert 'hx-swap-oob="afterbegin:#flash-messages"' in response.text
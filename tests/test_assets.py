@@ -0,0 +1,21 @@
+"""URLs dos arquivos estáticos (app.assets.static_url)."""
+import re
+
+STATIC_URL = re.compile(r'(?:href|src)="([^"]*/static/[^"]+)"')
+
+
+def _static_urls(client, host: str):
+    response = client.get("/", headers={"Host": host})
+    assert response.status_code == 200
+    return STATIC_URL.findall(response.text)
+
+
+def test_static_urls_do_not_depend_on_host(client):
+    # O cabeçalho e o rodapé ficam em cache: a primeira requisição não pode
+    # fixar o host dela nas URLs servidas para as outras
+    first = _static_urls(client, "testserver")
+    second = _static_urls(client, "clinic.lan:8000")
+
+    assert first
+    assert first == second
+    assert all(url.startswith("/static/") and "?v=" in url for url in first)
@@ -0,0 +1,52 @@
+"""A exportação de prontuários em streaming usa memória constante.
+
+Mesmo teste do ``benchmarks.export_memory``, mas comparando dois tamanhos:
+o pico do tracemalloc ao consumir toda a exportação não pode crescer com o
+número de linhas, e fica no tamanho de alguns lotes (EXPORT_BATCH_SIZE).
+"""
+import asyncio
+import datetime
+import tracemalloc
+
+import pytest
+
+from app.database import AsyncReadSessionLocal
+from app.export import stream_export
+from app.routers.medical_records import EXPORT_FIELDS, export_query
+
+MAX_PEAK_MB = 16
+
+
+async def _drain(fmt: str, start=None):
+    rows = 0
+    async with AsyncReadSessionLocal() as db:
+        async for chunk in stream_export(db, export_query(start=start), EXPORT_FIELDS, fmt):
+            rows += chunk.count("\n")
+    return rows
+
+
+def _peak(fmt: str, start=None):
+    tracemalloc.start()
+    try:
+        rows = asyncio.run(_drain(fmt, start))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return rows, peak / 1024 / 1024
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_export_peak_does_not_grow_with_rows(seeded_db, fmt):
+    # Aquece caches de compilação do SQLAlchemy e dos módulos antes de medir
+    _peak(fmt)
+
+    # Últimos 20 dias (~1/10 do histórico) x histórico inteiro
+    recent = (datetime.date.today() - datetime.timedelta(days=20)).isoformat()
+    small_rows, small_peak = _peak(fmt, start=recent)
+    large_rows, large_peak = _peak(fmt)
+
+    assert large_rows >= 5 * small_rows
+    assert large_peak <= MAX_PEAK_MB
+    # Folga para ruído do alocador; com o export bufferizado o pico
+    # cresceria junto com as linhas
+    assert large_peak <= small_peak * 1.25 + 0.5
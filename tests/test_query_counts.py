@@ -0,0 +1,37 @@
+"""Número de comandos SQL por requisição (cabeçalho X-Query-Count).
+
+Cada rota de lista/detalhe tem um teto fixo, medido com os caches frios. As
+páginas trazem dezenas de linhas com nomes de paciente/médico/especialidade:
+um N+1 (relacionamento carregado por linha) estoura o teto na hora.
+"""
+import pytest
+
+from app.metrics import QUERY_COUNT_HEADER
+
+# (rota, teto de consultas) para a página inteira e para o fragmento HTMX
+QUERY_BUDGETS = [
+    ("/patients", 3),
+    ("/patients/edit/5", 2),
+    ("/employees", 3),
+    ("/employees/edit/3", 3),
+    ("/employees/schedule/3", 3),
+    ("/users", 3),
+    ("/specialties/manage", 3),
+    ("/appointments/list", 4),
+    ("/consultations", 2),
+    ("/consultations/history", 5),
+    ("/consultations/view/1", 1),
+    ("/dashboard/stats", 4),
+    ("/api/v1/patients", 1),
+    ("/api/v1/patients/5", 1),
+    ("/api/v1/employees", 1),
+    ("/api/v1/appointments", 1),
+]
+
+
+@pytest.mark.parametrize("htmx", [False, True], ids=["page", "fragment"])
+@pytest.mark.parametrize("path,budget", QUERY_BUDGETS)
+def test_query_count_within_budget(client, path, budget, htmx):
+    response = client.get(path, headers={"HX-Request": "true"} if htmx else {})
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) <= budget
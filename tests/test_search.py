@@ -0,0 +1,14 @@
+"""Filtro da busca de prontuários (app.search.search_filter)."""
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.search import search_filter
+
+
+def test_postgres_name_match_escapes_like_wildcards():
+    pg = SimpleNamespace(dialect=postgresql.dialect())
+    compiled = search_filter(pg, "50%_a").compile(dialect=pg.dialect)
+
+    assert compiled.params["name"] == "%50\\%\\_a%"
+    assert "ESCAPE '\\'" in str(compiled)